@@ -1,20 +1,26 @@
-from flask import Flask, request
+from flask import Flask, request, _app_ctx_stack as ctx_stack
 import sys
 import json
 import os
+import time
+import hashlib
 import config
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate, MigrateCommand
 from flask_script import Manager
-from flask_jwt_extended import JWTManager, verify_jwt_in_request, get_jwt_identity, get_jwt_claims
+from flask_jwt_extended import JWTManager, verify_jwt_in_request, get_jwt_identity, get_jwt_claims, get_raw_jwt
 from datetime import timedelta
 from functools import wraps
 from flask_cors import CORS
 from dotenv import load_dotenv
+from apps.caching import LRUCache, registerCache
+from apps.compression import CompressionMiddleware
+from apps.representations import MsgpackRequest, MSGPACK_MIMETYPE
 
 load_dotenv()
 
 app = Flask(__name__)
+app.request_class = MsgpackRequest
 CORS(app)
 
 app.config['APP_DEBUG'] = True
@@ -34,14 +40,109 @@ try:
 except Exception as e:
     raise e
 
+# Refresh tokens are rotated, the used ones are checked against revoked_tokens
+app.config['JWT_BLACKLIST_ENABLED'] = True
+app.config['JWT_BLACKLIST_TOKEN_CHECKS'] = ['refresh']
+app.config['REVOCATION_FILTER_CAPACITY'] = int(os.environ.get('REVOCATION_FILTER_CAPACITY', 100000))
+app.config['REVOCATION_SYNC_SECONDS'] = float(os.environ.get('REVOCATION_SYNC_SECONDS', 5))
+
 jwt = JWTManager(app)
 
+# Password hashing
+app.config['PASSWORD_HASH_ROUNDS'] = int(os.environ.get('PASSWORD_HASH_ROUNDS', 535000))
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+app.config['PASSWORD_HASH_QUEUE_SIZE'] = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 32))
+app.config['PASSWORD_HASH_QUEUE_TIMEOUT'] = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 2))
+
+# Login throttling, limits are written as "<attempts>/<seconds>"
+app.config['LOGIN_THROTTLE_ADDRESS_LIMIT'] = os.environ.get('LOGIN_THROTTLE_ADDRESS_LIMIT', '30/60')
+app.config['LOGIN_THROTTLE_EMAIL_LIMIT'] = os.environ.get('LOGIN_THROTTLE_EMAIL_LIMIT', '5/60')
+app.config['LOGIN_THROTTLE_STORE'] = os.environ.get('LOGIN_THROTTLE_STORE', '') # path of a SQLite file shared by workers, empty keeps buckets in memory
+app.config['LOGIN_THROTTLE_MAX_KEYS'] = int(os.environ.get('LOGIN_THROTTLE_MAX_KEYS', 200000))
+
+# Profile cache, each server worker keeps its own so entries also expire after a TTL
+app.config['PROFILE_CACHE_SIZE'] = int(os.environ.get('PROFILE_CACHE_SIZE', 10000))
+app.config['PROFILE_CACHE_TTL'] = float(os.environ.get('PROFILE_CACHE_TTL', 60))
+
+# Home screen fan-out
+app.config['HOME_FANOUT_WORKERS'] = int(os.environ.get('HOME_FANOUT_WORKERS', 16))
+app.config['HOME_SECTION_TIMEOUT'] = float(os.environ.get('HOME_SECTION_TIMEOUT', 5))
+
+# Cache-Control of the public catalog responses, clients revalidate them with ETag / If-None-Match
+app.config['CATALOG_CACHE_CONTROL'] = os.environ.get('CATALOG_CACHE_CONTROL', 'public, max-age=60')
+
+# Delta sync of the catalog tables, a round reads up to CHANGES_SETTLE_SECONDS before the database clock
+app.config['CHANGES_SETTLE_SECONDS'] = float(os.environ.get('CHANGES_SETTLE_SECONDS', 2))
+app.config['CHANGES_DEFAULT_LIMIT'] = int(os.environ.get('CHANGES_DEFAULT_LIMIT', 500))
+app.config['CHANGES_MAX_LIMIT'] = int(os.environ.get('CHANGES_MAX_LIMIT', 2000))
+
+# Full-text search, 'auto' uses the FULLTEXT indexes on MySQL and an in-process inverted index on other databases
+app.config['SEARCH_BACKEND'] = os.environ.get('SEARCH_BACKEND', 'auto') # auto, fulltext or memory
+app.config['SEARCH_REFRESH_SECONDS'] = float(os.environ.get('SEARCH_REFRESH_SECONDS', 1))
+
+# Autocomplete of catalog names, each server worker keeps its own index and builds it again every AUTOCOMPLETE_REBUILD_SECONDS
+app.config['AUTOCOMPLETE_TOP_K'] = int(os.environ.get('AUTOCOMPLETE_TOP_K', 10))
+app.config['AUTOCOMPLETE_REBUILD_SECONDS'] = float(os.environ.get('AUTOCOMPLETE_REBUILD_SECONDS', 600))
+
+# Faceted service search, price ranges start at each SERVICE_PRICE_BUCKETS bound and the facet counts are cached SERVICE_FACETS_TTL seconds
+app.config['SERVICE_PRICE_BUCKETS'] = [int(bound) for bound in os.environ.get('SERVICE_PRICE_BUCKETS', '0,50000,100000,200000,500000').split(',')]
+app.config['SERVICE_FACETS_TTL'] = float(os.environ.get('SERVICE_FACETS_TTL', 5))
+
+# Response compression, bodies smaller than COMPRESSION_MIN_SIZE bytes are sent as they are
+app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+app.config['COMPRESSION_GZIP_LEVEL'] = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+app.config['COMPRESSION_BROTLI_QUALITY'] = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+response_compression = CompressionMiddleware(
+    app.wsgi_app,
+    min_size=app.config['COMPRESSION_MIN_SIZE'],
+    gzip_level=app.config['COMPRESSION_GZIP_LEVEL'],
+    brotli_quality=app.config['COMPRESSION_BROTLI_QUALITY'])
+app.wsgi_app = response_compression
+
+# Response cache of the almost-static catalog tables, each server worker keeps its own so entries also expire after a TTL
+app.config['RESPONSE_CACHE_SIZE'] = int(os.environ.get('RESPONSE_CACHE_SIZE', 1024))
+app.config['RESPONSE_CACHE_TTL'] = float(os.environ.get('RESPONSE_CACHE_TTL', 30))
+
+# Provider profiles, each server worker keeps its own so they also expire after a TTL
+app.config['PROVIDER_PROFILE_CACHE_SIZE'] = int(os.environ.get('PROVIDER_PROFILE_CACHE_SIZE', 1024))
+app.config['PROVIDER_PROFILE_CACHE_TTL'] = float(os.environ.get('PROVIDER_PROFILE_CACHE_TTL', 60))
+app.config['PROVIDER_PROFILE_SCHEDULE_LIMIT'] = int(os.environ.get('PROVIDER_PROFILE_SCHEDULE_LIMIT', 20))
+
+# Access tokens whose signature was already verified, keyed by a digest of the raw token
+app.config['JWT_VERIFIED_CACHE_SIZE'] = int(os.environ.get('JWT_VERIFIED_CACHE_SIZE', 4096))
+verified_tokens = registerCache('verified_tokens', LRUCache(app.config['JWT_VERIFIED_CACHE_SIZE']))
+
+def verifiedClaims():
+    """Verify the access token of the current request and get its user claims
+
+    A token that was verified before is read from verified_tokens until it expires,
+    skipping the signature check and the decoding done by verify_jwt_in_request().
+    """
+    header_name = app.config.get('JWT_HEADER_NAME', 'Authorization')
+    header_type = app.config.get('JWT_HEADER_TYPE', 'Bearer')
+    parts = request.headers.get(header_name, '').split()
+
+    key = None
+    if len(parts) == 2 and parts[0] == header_type:
+        key = hashlib.blake2b(parts[1].encode('utf-8'), digest_size=16).digest()
+        jwt_data = verified_tokens.get(key)
+        if jwt_data is not None:
+            ctx_stack.top.jwt = jwt_data
+            return get_jwt_claims()
+
+    verify_jwt_in_request()
+    jwt_data = get_raw_jwt()
+    if key is not None and jwt_data:
+        expires = jwt_data.get('exp')
+        verified_tokens.set(key, jwt_data, ttl=None if expires is None else expires - time.time())
+
+    return get_jwt_claims()
+
 # authorization for admin only
 def adminRequired(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        claims = get_jwt_claims()
+        claims = verifiedClaims()
         if claims['role'] == 2:
             return fn(*args, **kwargs)
         else:
@@ -52,9 +153,8 @@ def adminRequired(fn):
 def nonAdminRequired(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        claims = get_jwt_claims()
-        if claims['role'] == 1 | claims['role'] == 0:
+        claims = verifiedClaims()
+        if claims['role'] in (0, 1):
             return fn(*args, **kwargs)
         else:
             return {'status': 'Forbidden', 'message': 'user only'}, 403
@@ -64,9 +164,8 @@ def nonAdminRequired(fn):
 def jwtRequired(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        verify_jwt_in_request()
-        claims = get_jwt_claims()
-        if claims['role'] != None:
+        claims = verifiedClaims()
+        if claims.get('role') != None:
             return fn(*args, **kwargs)
         else:
             return {'status': 'Forbidden', 'message': 'user only'}, 403
@@ -98,13 +197,21 @@ def after_request(response):
         requestData = request.get_json()
     except Exception as e:
         requestData = request.args.to_dict()
+    # Streamed bodies are not buffered just to be logged, MessagePack bodies are binary
+    if response.is_streamed or response.mimetype == MSGPACK_MIMETYPE:
+        responseData = None
+    else:
+        try:
+            responseData = json.loads(response.get_data(as_text=True))
+        except ValueError:
+            responseData = response.get_data(as_text=True)
     app.logger.warning("REQUEST_LOG\t%s", json.dumps({
         'method': request.method,
         'code': response.status,
         'uri': request.full_path,
         'request': requestData,
-        'response': json.loads(response.data.decode('utf-8'))
-    })
+        'response': responseData
+    }, default=str)
     )
     return response
 
@@ -117,6 +224,11 @@ from apps.services.resource import bp_services
 from apps.conditions.resource import bp_conditions
 from apps.user_conditions.resource import bp_user_conditions
 from apps.user_infos.resource import bp_user_infos
+from apps.home.resource import bp_home
+from apps.metrics.resource import bp_metrics
+from apps.changes.resource import bp_changes
+from apps.search.resource import bp_search
+from apps.autocomplete.resource import bp_autocomplete
 
 version = 'v1'
 
@@ -128,5 +240,10 @@ app.register_blueprint(bp_services, url_prefix=f'/{version}/service')
 app.register_blueprint(bp_conditions, url_prefix=f'/{version}/condition')
 app.register_blueprint(bp_user_conditions, url_prefix=f'/{version}/user-condition')
 app.register_blueprint(bp_user_infos, url_prefix=f'/{version}/user-info')
+app.register_blueprint(bp_home, url_prefix=f'/{version}/home')
+app.register_blueprint(bp_metrics, url_prefix=f'/{version}/metrics')
+app.register_blueprint(bp_changes, url_prefix=f'/{version}/changes')
+app.register_blueprint(bp_search, url_prefix=f'/{version}/search')
+app.register_blueprint(bp_autocomplete, url_prefix=f'/{version}/autocomplete')
 
 db.create_all()
@@ -0,0 +1,49 @@
+from apps import db
+from flask_restful import fields
+
+
+class RevokedTokens(db.Model):
+    """Class for storing information about revoked_tokens table
+
+    Attributes:
+        __tablename__: a string of table name
+        id: an integer of revoked token's id. Workers use it as a high-water mark to sync their revocation filter
+        jti: a string of the revoked token's unique identifier
+        token_type: a string of the revoked token's type, such as: refresh
+        user_id: an integer of the token owner's id
+        expires_at: a datetime that indicates when the revoked token would have expired
+        created_at: a datetime that indicates when the token revoked
+        updated_at: a datetime that indicates when the row last updated
+        response_field: a dictionary that will be used to be a guide when extracting data from database's field
+    """
+    __tablename__ = "revoked_tokens"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    token_type = db.Column(db.String(10), nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime,  default=db.func.current_timestamp())
+    updated_at = db.Column(db.DateTime,  default=db.func.current_timestamp(
+    ), onupdate=db.func.current_timestamp())
+
+    response_fields = {
+        'id': fields.Integer,
+        'jti': fields.String,
+        'token_type': fields.String,
+        'user_id': fields.Integer,
+        'expires_at': fields.DateTime,
+    }
+
+    def __init__(self, data):
+        """Inits RevokedTokens with data of a decoded token
+
+        Args:
+            jti: a string of the revoked token's unique identifier
+            token_type: a string of the revoked token's type
+            user_id: an integer of the token owner's id
+            expires_at: a datetime that indicates when the revoked token would have expired
+        """
+        self.jti = data['jti']
+        self.token_type = data['token_type']
+        self.user_id = data['user_id']
+        self.expires_at = data['expires_at']
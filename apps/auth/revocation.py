@@ -0,0 +1,135 @@
+from apps import db
+from .model import RevokedTokens
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+import hashlib
+import math
+import threading
+import time
+
+
+class BloomFilter():
+    """Class for a fixed-size Bloom filter over strings
+
+    Answers "definitely not added" or "maybe added". The bit array is sized for
+    capacity items at the given false positive rate.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        # Only count items that set a new bit, so adding the same jti twice is free
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, item):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList():
+    """Class for checking revoked tokens without a database query in the common case
+
+    Each server worker keeps a Bloom filter of revoked jtis. Every sync_seconds it reads
+    only the revoked_tokens rows added since its last sync, using the row id as a
+    high-water mark. When the filter holds more jtis than it was sized for, it is
+    rebuilt from the rows that have not expired yet. A jti missing from the filter is
+    not revoked; a jti in the filter is confirmed against the table, since it may be a
+    false positive.
+
+    Attributes:
+        capacity: an integer of jtis the filter is sized for
+        sync_seconds: a float of seconds between two syncs with the revoked_tokens table
+    """
+
+    def __init__(self, capacity, sync_seconds):
+        self.capacity = capacity
+        self.sync_seconds = sync_seconds
+        self._filter = BloomFilter(capacity)
+        self._last_id = 0
+        self._next_sync = 0
+        self._lock = threading.Lock()
+
+    def _sync(self):
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+
+        with self._lock:
+            if now < self._next_sync:
+                return
+
+            if self._filter.count >= self.capacity:
+                self._rebuild()
+
+            rows = db.session.query(RevokedTokens.id, RevokedTokens.jti).filter(
+                RevokedTokens.id > self._last_id).order_by(RevokedTokens.id).all()
+            for row_id, jti in rows:
+                self._filter.add(jti)
+                self._last_id = row_id
+
+            self._next_sync = now + self.sync_seconds
+
+    def _rebuild(self):
+        rows = db.session.query(RevokedTokens.id, RevokedTokens.jti).filter(
+            RevokedTokens.expires_at > datetime.utcnow()).order_by(RevokedTokens.id).all()
+
+        # Grow the filter when even the unexpired rows would not fit
+        while len(rows) * 2 >= self.capacity:
+            self.capacity *= 2
+
+        self._filter = BloomFilter(self.capacity)
+        for row_id, jti in rows:
+            self._filter.add(jti)
+            self._last_id = max(self._last_id, row_id)
+
+    def isRevoked(self, jti):
+        """Check whether a jti was revoked"""
+        self._sync()
+        if jti not in self._filter:
+            return False
+
+        return db.session.query(RevokedTokens.id).filter_by(jti=jti).first() is not None
+
+    def revoke(self, jwt_data, user_id=None):
+        """Store a decoded token as revoked
+
+        The insert relies on the unique jti, so two concurrent requests presenting the
+        same token can not both revoke it.
+
+        Returns:
+            True when the token was revoked by this call, False when it already was.
+        """
+        revoked = RevokedTokens({
+            'jti': jwt_data['jti'],
+            'token_type': jwt_data['type'],
+            'user_id': user_id,
+            'expires_at': datetime.utcfromtimestamp(jwt_data['exp']),
+        })
+        db.session.add(revoked)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+        with self._lock:
+            self._filter.add(jwt_data['jti'])
+        return True
@@ -0,0 +1,138 @@
+from apps.caching import LRUCache
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+
+
+def parseLimit(value):
+    """Parse a limit written as "<attempts>/<seconds>" into (capacity, refill_per_second)"""
+    attempts, seconds = value.split('/')
+    return float(attempts), float(attempts) / float(seconds)
+
+
+def _digest(key):
+    """Shrink a bucket key to 8 bytes so millions of keys stay cheap to hold"""
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+
+
+def _take(tokens, stamp, now, capacity, rate):
+    """Refill a bucket up to now and try to take one token from it
+
+    Returns:
+        A tuple of (allowed, tokens_left, retry_after, seconds_until_full)
+    """
+    tokens = min(capacity, tokens + (now - stamp) * rate)
+    if tokens >= 1:
+        tokens -= 1
+        return True, tokens, 0, (capacity - tokens) / rate
+
+    return False, tokens, (1 - tokens) / rate, (capacity - tokens) / rate
+
+
+class MemoryBucketStore():
+    """Class for token buckets kept in this worker's memory
+
+    A bucket is a (tokens, timestamp) tuple that expires once it would be full again,
+    because a missing bucket and a full one mean the same thing. The number of buckets
+    is capped by max_keys.
+    """
+
+    def __init__(self, max_keys):
+        self._buckets = LRUCache(max_keys)
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        now = time.time()
+        with self._lock:
+            tokens, stamp = self._buckets.get(key, (capacity, now), count=False)
+            allowed, tokens, retry_after, ttl = _take(tokens, stamp, now, capacity, rate)
+            self._buckets.set(key, (tokens, now), ttl=ttl)
+        return allowed, retry_after
+
+
+class SQLiteBucketStore():
+    """Class for token buckets shared by every server worker on this host through a SQLite file
+
+    Each take() runs in its own immediate transaction, so concurrent workers never lose
+    an update. Rows carry the time their bucket would be full again and are purged in
+    batches once that time has passed.
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._takes = 0
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS login_buckets ('
+            'key BLOB PRIMARY KEY, tokens REAL NOT NULL, stamp REAL NOT NULL, expires REAL NOT NULL'
+            ') WITHOUT ROWID')
+        self._connection().execute('CREATE INDEX IF NOT EXISTS ix_login_buckets_expires ON login_buckets (expires)')
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            self._local.connection = connection
+        return connection
+
+    def take(self, key, capacity, rate):
+        now = time.time()
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT tokens, stamp FROM login_buckets WHERE key = ?', (key,)).fetchone()
+            tokens, stamp = row if row is not None else (capacity, now)
+            allowed, tokens, retry_after, ttl = _take(tokens, stamp, now, capacity, rate)
+            connection.execute(
+                'INSERT OR REPLACE INTO login_buckets (key, tokens, stamp, expires) VALUES (?, ?, ?, ?)',
+                (key, tokens, now, now + ttl))
+
+            self._takes += 1
+            if self._takes % self.PURGE_EVERY == 0:
+                connection.execute('DELETE FROM login_buckets WHERE expires < ?', (now,))
+
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+        return allowed, retry_after
+
+
+class LoginThrottle():
+    """Class for limiting login attempts per client address and per email
+
+    The address bucket is checked first so a flood from one client does not drain the
+    buckets of the emails it is guessing.
+
+    Attributes:
+        store: a bucket store, either MemoryBucketStore or SQLiteBucketStore
+        address_limit: a tuple of (capacity, refill_per_second) for each client address
+        email_limit: a tuple of (capacity, refill_per_second) for each email
+    """
+
+    def __init__(self, store, address_limit, email_limit):
+        self.store = store
+        self.address_limit = address_limit
+        self.email_limit = email_limit
+
+    def check(self, email, address):
+        """Take one attempt from the address and email buckets
+
+        Returns:
+            None when the attempt is allowed, otherwise the number of seconds to wait
+        """
+        allowed, retry_after = self.store.take(_digest('ip:' + (address or '')), *self.address_limit)
+        if allowed:
+            allowed, retry_after = self.store.take(_digest('email:' + email.strip().lower()), *self.email_limit)
+
+        if allowed:
+            return None
+
+        return max(1, math.ceil(retry_after))
@@ -0,0 +1,288 @@
+from bisect import bisect_left, insort
+from apps import app, db
+from apps.categories.model import Categories
+from apps.conditions.model import Conditions
+from apps.providers.model import Providers
+from apps.services.model import Services
+from apps.order_details.model import OrderDetails
+from apps.user_conditions.model import UserConditions
+# The tables order_details refers to, so its foreign keys resolve
+from apps.orders.model import Orders
+from apps.coupons.model import Coupons
+import heapq
+import os
+import threading
+import time
+
+
+def normalize(text):
+    """Lowercase a text and collapse its whitespace"""
+    return ' '.join((text or '').lower().split())
+
+
+class PrefixIndex():
+    """Class for a compact in-memory index suggesting labels by prefix, most popular first
+
+    Every label is kept under one key per word, the label from that word on, so "sari"
+    finds "Bidan Sari". The keys sit in one sorted list of (key, kind, id) tuples and a
+    prefix is the range bisect finds in it. The range of a short prefix can hold a
+    large part of the index, so the top_k entries of every prefix up to depth
+    characters are kept ready and updated in place by each write. A longer prefix
+    matches a shorter range, which is ranked when it is first asked and kept until the
+    next write.
+
+    Attributes:
+        top_k: an integer of the most suggestions a search returns
+        depth: an integer of the longest prefix whose top entries are kept ready
+        entries: a dict mapping (kind, id) to (label, popularity)
+    """
+
+    # Most longer prefixes whose ranking is kept until the next write
+    max_ranked = 4096
+
+    def __init__(self, top_k=10, depth=3):
+        self.top_k = top_k
+        self.depth = depth
+        self.entries = {}
+        self._keys = []
+        self._top = {}
+        self._ranked = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _keysOf(label):
+        words = normalize(label).split(' ')
+        return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+    def _prefixes(self, keys):
+        return {key[:length] for key in keys for length in range(1, min(len(key), self.depth) + 1)}
+
+    def _range(self, prefix):
+        return bisect_left(self._keys, (prefix,)), bisect_left(self._keys, (prefix + '\uffff',))
+
+    def _rank(self, prefix, limit):
+        start, stop = self._range(prefix)
+        entries = {(kind, row_id) for _, kind, row_id in self._keys[start:stop]}
+        return heapq.nsmallest(limit, entries, key=self._order)
+
+    def _order(self, entry):
+        label, popularity = self.entries[entry]
+        return (-popularity, label, entry)
+
+    def build(self, rows):
+        """Fill the index from an iterable of (kind, id, label, popularity), replacing its content"""
+        self.entries = {}
+        keys = []
+        for kind, row_id, label, popularity in rows:
+            self.entries[(kind, row_id)] = (label, popularity)
+            keys.extend((key, kind, row_id) for key in self._keysOf(label))
+        keys.sort()
+        self._keys = keys
+
+        candidates = {}
+        for key, kind, row_id in keys:
+            for prefix in self._prefixes((key,)):
+                candidates.setdefault(prefix, set()).add((kind, row_id))
+        self._top = {prefix: heapq.nsmallest(self.top_k, entries, key=self._order)
+                     for prefix, entries in candidates.items()}
+        self._ranked = {}
+
+    def _refreshTop(self, prefix):
+        top = self._rank(prefix, self.top_k)
+        if top:
+            self._top[prefix] = top
+        else:
+            self._top.pop(prefix, None)
+
+    def _place(self, prefix, entry):
+        # Move entry to its rank among the top entries of prefix, the range is scanned
+        # again only when it may have fallen behind an entry that was not listed
+        top = self._top.setdefault(prefix, [])
+        was_full = entry in top and len(top) >= self.top_k
+        if entry in top:
+            top.remove(entry)
+
+        position = bisect_left([self._order(listed) for listed in top], self._order(entry))
+        if was_full and position >= len(top):
+            self._refreshTop(prefix)
+        elif position < self.top_k:
+            top.insert(position, entry)
+            del top[self.top_k:]
+
+    def _displace(self, prefix, entry):
+        top = self._top.get(prefix)
+        if not top or entry not in top:
+            return
+        if len(top) < self.top_k:
+            # Every entry of the prefix is listed, none can take the free place
+            top.remove(entry)
+            if not top:
+                del self._top[prefix]
+        else:
+            self._refreshTop(prefix)
+
+    def _drop(self, entry):
+        label, popularity = self.entries.pop(entry)
+        keys = self._keysOf(label)
+        for key in keys:
+            position = bisect_left(self._keys, (key,) + entry)
+            if position < len(self._keys) and self._keys[position] == (key,) + entry:
+                del self._keys[position]
+        return keys, popularity
+
+    def upsert(self, kind, row_id, label, popularity=None):
+        """Add or rename an entry, keeping its popularity when popularity is None"""
+        entry = (kind, row_id)
+        keys = set()
+        previous = 0
+        if entry in self.entries:
+            keys, previous = self._drop(entry)
+
+        self.entries[entry] = (label, previous if popularity is None else popularity)
+        new_keys = self._keysOf(label)
+        for key in new_keys:
+            insort(self._keys, (key,) + entry)
+
+        new_prefixes = self._prefixes(new_keys)
+        for prefix in self._prefixes(keys) - new_prefixes:
+            self._displace(prefix, entry)
+        for prefix in new_prefixes:
+            self._place(prefix, entry)
+        self._ranked.clear()
+
+    def remove(self, kind, row_id):
+        """Drop an entry, if it is there"""
+        entry = (kind, row_id)
+        if entry in self.entries:
+            keys, _ = self._drop(entry)
+            for prefix in self._prefixes(keys):
+                self._displace(prefix, entry)
+            self._ranked.clear()
+
+    def search(self, prefix, limit):
+        """Get the [(kind, id, label, popularity)] of the entries with a word starting with prefix"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        limit = min(limit, self.top_k)
+        if len(prefix) <= self.depth:
+            top = self._top.get(prefix, [])[:limit]
+        else:
+            top = self._ranked.get(prefix)
+            if top is None:
+                if len(self._ranked) >= self.max_ranked:
+                    self._ranked.clear()
+                top = self._ranked[prefix] = self._rank(prefix, self.top_k)
+            top = top[:limit]
+        return [entry + self.entries[entry] for entry in top]
+
+
+class Autocomplete():
+    """Class for the autocomplete of category, condition and provider names of this server worker
+
+    The index is built from the tables on first use, with popularity counted from the
+    order details of each provider and category and the user conditions of each
+    condition (the users who recorded it, each counted once). The resources writing
+    those tables update it through upsert() and remove(). Every rebuild_seconds a
+    background thread of the worker builds it again, which refreshes the popularity
+    and picks up the writes other workers served, so a search never waits on the
+    database after the first one. Requests keep using the old index while the new one
+    is built, and the writes made meanwhile are applied to both.
+
+    Attributes:
+        top_k: an integer of the most suggestions a search returns
+        rebuild_seconds: a float of seconds between two builds
+    """
+
+    def __init__(self, top_k, rebuild_seconds):
+        self.top_k = top_k
+        self.rebuild_seconds = rebuild_seconds
+        self._index = None
+        self._pending = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _rows(self):
+        sources = [
+            ('category', Categories, Categories.name, db.session.query(Services.category_id, db.func.count(OrderDetails.id)).join(
+                OrderDetails, OrderDetails.service_id == Services.id).group_by(Services.category_id)),
+            ('condition', Conditions, Conditions.condition, db.session.query(UserConditions.condition_id, db.func.count(db.distinct(UserConditions.user_id))).group_by(
+                UserConditions.condition_id)),
+            ('provider', Providers, Providers.name, db.session.query(OrderDetails.provider_id, db.func.count(OrderDetails.id)).group_by(
+                OrderDetails.provider_id)),
+        ]
+        for kind, model, column, popularity in sources:
+            counts = dict(popularity.all())
+            for row_id, label in db.session.query(model.id, column).yield_per(1000):
+                yield kind, row_id, label, counts.get(row_id, 0)
+
+    def _build(self):
+        index = PrefixIndex(self.top_k)
+        index.build(self._rows())
+        return index
+
+    def _refresh(self):
+        if self._index is not None and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._index is None:
+                self._index = self._build()
+            # Threads do not survive a fork, so each server worker starts its own
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._rebuildEvery, name='autocomplete-rebuild', daemon=True).start()
+
+    def _rebuildEvery(self):
+        while True:
+            time.sleep(self.rebuild_seconds)
+            try:
+                with app.app_context():
+                    self._rebuild()
+            except Exception:
+                app.logger.exception('autocomplete rebuild failed')
+
+    def _rebuild(self):
+        with self._lock:
+            self._pending = []
+
+        try:
+            index = self._build()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            for write, args in self._pending:
+                getattr(index, write)(*args)
+            self._index = index
+            self._pending = None
+
+    def _write(self, write, *args):
+        with self._lock:
+            if self._index is None:
+                return
+            getattr(self._index, write)(*args)
+            if self._pending is not None:
+                self._pending.append((write, args))
+
+    def upsert(self, kind, row_id, label):
+        """Add or rename the entry of a row after it was written"""
+        self._write('upsert', kind, int(row_id), label)
+
+    def remove(self, kind, row_id):
+        """Drop the entry of a row after it was deleted"""
+        self._write('remove', kind, int(row_id))
+
+    def search(self, prefix, limit):
+        """Get the [(kind, id, label, popularity)] of the most popular entries with a word starting with prefix"""
+        self._refresh()
+        with self._lock:
+            return self._index.search(prefix, limit)
+
+
+autocomplete = Autocomplete(app.config['AUTOCOMPLETE_TOP_K'], app.config['AUTOCOMPLETE_REBUILD_SECONDS'])
@@ -0,0 +1,66 @@
+from flask import Blueprint
+from flask_restful import Resource, Api, reqparse
+from apps import app
+from ..commons import cors_value, cors_status, content_type_json
+from ..representations import registerRepresentations
+from .index import autocomplete
+
+bp_autocomplete = Blueprint('autocomplete', __name__)
+api = Api(bp_autocomplete)
+registerRepresentations(api)
+
+
+def _limitType(value):
+    value = int(value)
+    if value < 1 or value > app.config['AUTOCOMPLETE_TOP_K']:
+        raise ValueError('limit must be between 1 and {}'.format(app.config['AUTOCOMPLETE_TOP_K']))
+    return value
+
+
+class AutocompleteResource(Resource):
+    """Class for storing HTTP request method for the search box suggestions, accessed by everyone"""
+
+    def __init__(self):
+        pass
+
+    def options(self):
+        """Flask-CORS function to make Flask allowing our apps to support cross origin resource sharing (CORS)"""
+        return cors_value, cors_status
+
+    def get(self):
+        """Suggest category, condition and provider names starting with the typed text
+
+        A name is suggested when any of its words starts with q, case insensitive. The
+        suggestions come from an index kept in memory by each server worker, no query
+        is sent to the database.
+
+        Args (located in query string):
+            q: a string of the typed text
+            limit: an integer of the most suggestions, up to AUTOCOMPLETE_TOP_K
+
+        Returns:
+            A dict of the suggestions, most popular first. popularity is the number of
+            orders of a provider or category, and the number of users with a condition.
+            For example:
+
+            {
+                "suggestions": [
+                    {"type": "category", "id": 1, "label": "Pijat Bayi", "popularity": 42},
+                    {"type": "provider", "id": 3, "label": "Bidan Sari Pijat", "popularity": 17}
+                ]
+            }
+
+        Raise:
+            Bad Request(400): An error occured when q is missing or limit is out of range
+        """
+        parser = reqparse.RequestParser()
+        parser.add_argument('q', location='args', required=True)
+        parser.add_argument('limit', type=_limitType, location='args', default=app.config['AUTOCOMPLETE_TOP_K'])
+        args = parser.parse_args()
+
+        suggestions = autocomplete.search(args['q'], args['limit'])
+        return {'suggestions': [{'type': kind, 'id': row_id, 'label': label, 'popularity': popularity}
+                                for kind, row_id, label, popularity in suggestions]}, 200, content_type_json
+
+
+api.add_resource(AutocompleteResource, '')
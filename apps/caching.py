@@ -0,0 +1,103 @@
+from collections import OrderedDict
+import threading
+import time
+
+# Caches reported by the admin metrics endpoint, keyed by name
+registry = {}
+
+
+def registerCache(name, cache):
+    """Add a cache with a stats() method to the registry and return it"""
+    registry[name] = cache
+    return cache
+
+
+class LRUCache():
+    """Class for a small thread-safe in-process cache with LRU and expiry-aware eviction
+
+    Every entry carries its own expiry time. Expired entries are dropped when they are
+    read, and when the cache is full every expired entry is purged (at most once per
+    PURGE_INTERVAL seconds) before the least recently used one is evicted.
+
+    Attributes:
+        maxsize: an integer of entries kept at most
+        ttl: a float of seconds an entry lives when set() is not given its own ttl. None never expires
+        hits: an integer of get() calls answered from the cache
+        misses: an integer of get() calls that found nothing or an expired entry
+        evictions: an integer of live entries dropped to make room
+    """
+
+    PURGE_INTERVAL = 1.0
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_purge = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None, count=True):
+        """Get a live value by key, marking it as recently used"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= now:
+                del self._data[key]
+                entry = None
+
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """Store a value. ttl overrides the cache default for this entry only"""
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        expires_at = None if ttl is None else now + ttl
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            elif len(self._data) >= self.maxsize:
+                self._purge(now)
+                while len(self._data) >= self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+            self._data[key] = (value, expires_at)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _purge(self, now):
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self.PURGE_INTERVAL
+        expired = [key for key, entry in self._data.items() if entry[1] is not None and entry[1] <= now]
+        for key in expired:
+            del self._data[key]
+
+    def stats(self):
+        """Get the cache counters as a dict"""
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -4,9 +4,17 @@ from .model import Categories
 from apps import app, db, adminRequired, nonAdminRequired, jwtRequired
 from flask_jwt_extended import jwt_required, get_jwt_claims
 from ..commons import cors_value, cors_status, content_type_json
+from ..listing import ListEngine
+from ..representations import registerRepresentations
+from ..conditional import rowValidators, cacheHeaders, notModified
+from ..changes.model import Tombstones
+from ..autocomplete.index import autocomplete
+from ..response_cache import response_cache
 
 bp_categories = Blueprint('categories', __name__)
 api = Api(bp_categories)
+registerRepresentations(api)
+categories_list = ListEngine(Categories, cache=response_cache)
 
 
 class CategoriesResource(Resource):
@@ -54,6 +62,8 @@ class CategoriesResource(Resource):
         category = Categories(new_category)
         db.session.add(category)
         db.session.commit()
+        response_cache.invalidate('categories')
+        autocomplete.upsert('category', category.id, category.name)
 
         app.logger.debug('DEBUG : %s', category)
 
@@ -72,10 +82,25 @@ class CategoriesResource(Resource):
                 "details": "Pijat Bayi untuk Umur 2 Tahun",
             }
 
+        The response carries the ETag and Last-Modified of the row, a request whose
+        If-None-Match or If-Modified-Since still matches gets 304 Not Modified.
         """
-        category = Categories.query.get(id)
+        cached, ticket = response_cache.get('categories', id)
+        if cached is None:
+            category = Categories.query.get(id)
+            if category is None:
+                return marshal(category, Categories.response_fields), 200, content_type_json
 
-        return marshal(category, Categories.response_fields), 200, {'Content_Type': 'application/json'}
+            etag, last_modified = rowValidators(category)
+            cached = (marshal(category, Categories.response_fields), cacheHeaders(content_type_json, etag, last_modified), etag, last_modified)
+            response_cache.set(ticket, cached)
+
+        body, headers, etag, last_modified = cached
+        not_modified = notModified(etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        return body, 200, headers
 
     # @adminRequired
     def put(self, id):
@@ -113,12 +138,14 @@ class CategoriesResource(Resource):
             category.details = args['details']
 
         db.session.commit()
+        response_cache.invalidate('categories', id)
+        autocomplete.upsert('category', category.id, category.name)
 
         return marshal(category, Categories.response_fields), 200, {'Content_Type': 'application/json'}
 
     # @adminRequired
     def delete(self, id):
-        """Hard delete a single record from categories table 
+        """Hard delete a single record from categories table, leaving a tombstone for the changes endpoint
         Args (located in function's parameter): 
             id: An integer of category's id which want to be deleted
         Returns:
@@ -133,7 +160,10 @@ class CategoriesResource(Resource):
             return {'status': 'Not Found'}, 404, {'Content_Type': 'application/json'}
 
         db.session.delete(category)
+        db.session.add(Tombstones({'table_name': Categories.__tablename__, 'row_id': category.id}))
         db.session.commit()
+        response_cache.invalidate('categories', id)
+        autocomplete.remove('category', id)
         return {"Status": "The data with id {} is deleted".format(id)}, 200, {'Content_Type': 'application/json'}
 
 
@@ -150,6 +180,11 @@ class CategoriesList(Resource):
     def get(self):
         """Get all category's data from categories table
 
+            Pages are read with the opaque cursor of the Link header (rel="next"/"prev"),
+            which seeks past the last row instead of counting OFFSET rows. p still works
+            for clients that do not follow the links. The accepted filters, orderby values
+            and largest rp are declared in Categories.list_options.
+
             Returns : An array of dictionary contains all data from users. Example :
             [
                 {   
@@ -166,30 +201,9 @@ class CategoriesList(Resource):
 
             Raise:
               Forbidden(403): An error occured when standard user try to access this method.  
+              Bad Request(400): An error occured when the filters and orderby are not served by one index, or the cursor is invalid
         """
-        parser = reqparse.RequestParser()
-        parser.add_argument('p', type=int, location='args', default=1)
-        parser.add_argument('rp', type=int, location='args', default=25)
-        parser.add_argument('orderby', location='args', choices=('id'))
-        parser.add_argument('sort', location='args', choices=('asc', 'desc'))
-        args = parser.parse_args()
-
-        offset = (args['p'] * args['rp']) - args['rp']
-
-        qry = Categories.query
-
-        if args['orderby'] is not None:
-            if args['orderby'] == 'id':
-                if args['sort'] == 'desc':
-                    qry = qry.order_by(desc(Categories.id)) 
-                else:
-                    qry = qry.order_by((Categories.id))
-
-        rows = []
-        for row in qry.limit(args['rp']).offset(offset).all():
-            rows.append(marshal(row, Categories.response_fields))
-
-        return rows, 200, {'Content-Type': 'application/json'}
+        return categories_list.get()
 
 api.add_resource(CategoriesResource, '', '/<id>')
 api.add_resource(CategoriesList, '/list')
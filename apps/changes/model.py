@@ -0,0 +1,37 @@
+from apps import db
+from flask_restful import fields
+
+
+class Tombstones(db.Model):
+    """Class for storing information about tombstones table, one row per hard deleted catalog row
+
+    Attributes:
+        __tablename__: a string of table name
+        id: an integer of tombstone's id. It breaks ties between rows deleted in the same second
+        table_name: a string of the table the row was deleted from, such as: categories
+        row_id: an integer of the deleted row's id
+        deleted_at: a datetime that indicates when the row deleted
+        response_field: a dictionary that will be used to be a guide when extracting data from database's field
+    """
+    __tablename__ = "tombstones"
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    table_name = db.Column(db.String(30), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=db.func.current_timestamp(), nullable=False, index=True)
+
+    response_fields = {
+        'id': fields.Integer,
+        'table_name': fields.String,
+        'row_id': fields.Integer,
+        'deleted_at': fields.DateTime,
+    }
+
+    def __init__(self, data):
+        """Inits Tombstones with the deleted row
+
+        Args:
+                table_name: a string of the table the row was deleted from.
+                row_id: an integer of the deleted row's id.
+        """
+        self.table_name = data['table_name']
+        self.row_id = data['row_id']
@@ -0,0 +1,219 @@
+from collections import OrderedDict
+from datetime import timedelta
+from flask import Blueprint
+from flask_restful import Resource, Api, reqparse, inputs
+from .model import Tombstones
+from apps import app, db
+from ..commons import cors_value, cors_status, content_type_json
+from ..pagination import encodeToken, decodeToken, seek
+from ..representations import registerRepresentations
+from ..serializers import serializer
+
+from apps.categories.model import Categories
+from apps.conditions.model import Conditions
+from apps.providers.model import Providers
+from apps.services.model import Services
+
+bp_changes = Blueprint('changes', __name__)
+api = Api(bp_changes)
+registerRepresentations(api)
+
+# The catalog tables clients keep a copy of, in the order their changes are read
+synced_tables = OrderedDict([
+    ('categories', Categories),
+    ('conditions', Conditions),
+    ('providers', Providers),
+    ('services', Services),
+])
+
+
+def _tablesType(value):
+    tables = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in tables if name not in synced_tables]
+    if not tables or unknown:
+        raise ValueError('tables must be a comma separated list of {}'.format(', '.join(synced_tables)))
+    return [name for name in synced_tables if name in tables]
+
+
+def _limitType(value):
+    value = int(value)
+    if value < 1 or value > app.config['CHANGES_MAX_LIMIT']:
+        raise ValueError('limit must be between 1 and {}'.format(app.config['CHANGES_MAX_LIMIT']))
+    return value
+
+
+def encodeSyncCursor(tables, positions, until=None):
+    """Encode the position of a sync into an opaque url-safe token
+
+    Args:
+        tables: a list of the synced table names
+        positions: a dict mapping a table name, or 'tombstones', to the (updated_at, id)
+            of the last row read from it
+        until: a datetime the current round reads up to, None once the round is finished
+    """
+    return encodeToken({
+        'tables': tables,
+        'until': until.isoformat() if until is not None else None,
+        'positions': {name: [value.isoformat(), row_id] for name, (value, row_id) in positions.items()},
+    })
+
+
+def decodeSyncCursor(token):
+    """Decode a token made by encodeSyncCursor into (tables, positions, until). Raises ValueError when it is malformed"""
+    data = decodeToken(token)
+    try:
+        tables = _tablesType(','.join(data['tables']))
+        until = inputs.datetime_from_iso8601(data['until']) if data['until'] is not None else None
+        positions = {}
+        for name, (value, row_id) in data['positions'].items():
+            if name not in synced_tables and name != 'tombstones':
+                raise ValueError('invalid cursor')
+            positions[name] = (inputs.datetime_from_iso8601(value), int(row_id))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise ValueError('invalid cursor')
+
+    return tables, positions, until
+
+
+def readChanges(tables, positions, until, limit):
+    """Read the rows written and deleted after positions, up to until
+
+    Each table is read in (updated_at, id) order through its updated_at index, seeking
+    past the last row read, then the tombstones of the tables are read in
+    (deleted_at, id) order. Reading stops once limit rows were read.
+
+    Args:
+        tables: a list of the synced table names
+        positions: a dict of the last (updated_at, id) read from each table and from
+            'tombstones', updated in place
+        until: a datetime, rows written after it are left to the next round
+        limit: an integer of the most rows read
+
+    Returns:
+        A (changes, deleted, more) tuple, where changes maps each table name to its
+        serialized rows, deleted maps it to the deleted ids and more is True when rows
+        are left before until.
+    """
+    changes = OrderedDict()
+    deleted = OrderedDict((name, []) for name in tables)
+    remaining = limit
+
+    sources = [(name, model, model.updated_at, model.id, model.query) for name, model in synced_tables.items() if name in tables]
+    sources.append(('tombstones', Tombstones, Tombstones.deleted_at, Tombstones.id,
+                    Tombstones.query.filter(Tombstones.table_name.in_(tables))))
+
+    for name, model, column, id_column, qry in sources:
+        qry = qry.filter(column <= until)
+        if name in positions:
+            qry = qry.filter(seek(column, id_column, positions[name], True))
+
+        rows = qry.order_by(column, id_column).limit(remaining + 1).all()
+        more = len(rows) > remaining
+        rows = rows[:remaining]
+        remaining -= len(rows)
+        if rows:
+            positions[name] = (getattr(rows[-1], column.key), rows[-1].id)
+
+        if model is Tombstones:
+            for row in rows:
+                deleted[row.table_name].append(row.row_id)
+        else:
+            changes[name] = list(map(serializer(model.response_fields), rows))
+
+        if more:
+            return changes, deleted, True
+
+    return changes, deleted, False
+
+
+class ChangesResource(Resource):
+    """Class for storing HTTP request method for the changes of the catalog tables, used by clients to sync their copy"""
+
+    def __init__(self):
+        pass
+
+    def options(self):
+        """Flask-CORS function to make Flask allowing our apps to support cross origin resource sharing (CORS)"""
+        return cors_value, cors_status
+
+    def get(self):
+        """Get the catalog rows written and deleted since the client's last sync
+
+        The first sync passes since (an ISO 8601 datetime in the database's time zone), or
+        nothing to read every row. Each response carries a cursor; while more is true the
+        client asks again with that cursor, and once more is false it keeps the cursor for
+        its next sync. A cursor resumes exactly where its response stopped, so an
+        interrupted sync is continued with the last cursor received.
+
+        A round reads up to CHANGES_SETTLE_SECONDS before the database clock, so rows
+        written by transactions still in flight, whose updated_at is already in the past,
+        are not skipped.
+
+        Args (located in query string):
+            since: an ISO 8601 datetime, used only without a cursor
+            cursor: a string cursor of a previous response
+            tables: a comma separated list of the synced tables, all of them by default.
+                A cursor keeps the tables it was made for
+            limit: an integer of the most rows in one response
+
+        Returns:
+            A dict of the rows written by table, the ids deleted by table and the cursor.
+            For example:
+
+            {
+                "changes": {
+                    "categories": [{"id": 1, "name": "Pijat Bayi", "details": "Pijat Bayi untuk Umur 2 Tahun"}],
+                    "services": []
+                },
+                "deleted": {
+                    "categories": [3],
+                    "services": [12, 15]
+                },
+                "cursor": "eyJ0YWJsZXMiOlsiY2F0ZWdvcmllcyIsInNlcnZpY2VzIl0...",
+                "more": false
+            }
+
+        Raise:
+            Bad Request(400): An error occured when the cursor is invalid, or the tables do not match the cursor's
+        """
+        parser = reqparse.RequestParser()
+        parser.add_argument('since', type=inputs.datetime_from_iso8601, location='args')
+        parser.add_argument('cursor', location='args')
+        parser.add_argument('tables', type=_tablesType, location='args')
+        parser.add_argument('limit', type=_limitType, location='args', default=app.config['CHANGES_DEFAULT_LIMIT'])
+        args = parser.parse_args()
+
+        if args['cursor'] is not None:
+            try:
+                tables, positions, until = decodeSyncCursor(args['cursor'])
+            except ValueError:
+                return {'message': 'Invalid cursor'}, 400, content_type_json
+            if args['tables'] is not None and args['tables'] != tables:
+                return {'message': 'The cursor was made for the tables {}'.format(', '.join(tables))}, 400, content_type_json
+        else:
+            tables = args['tables'] or list(synced_tables)
+            until = None
+
+        if until is None:
+            now = db.session.query(db.func.current_timestamp()).scalar()
+            until = now - timedelta(seconds=app.config['CHANGES_SETTLE_SECONDS'])
+
+        if args['cursor'] is None:
+            if args['since'] is not None:
+                since = args['since'].replace(tzinfo=None)
+                positions = {name: (since, 0) for name in tables + ['tombstones']}
+            else:
+                # A client without a copy has nothing to delete
+                positions = {'tombstones': (until, 0)}
+
+        changes, deleted, more = readChanges(tables, positions, until, args['limit'])
+
+        return {
+            'changes': changes,
+            'deleted': deleted,
+            'cursor': encodeSyncCursor(tables, positions, until if more else None),
+            'more': more,
+        }, 200, content_type_json
+
+
+api.add_resource(ChangesResource, '')
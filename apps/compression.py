@@ -0,0 +1,192 @@
+from werkzeug.http import parse_accept_header
+import threading
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class _Gzip():
+    name = 'gzip'
+
+    def __init__(self, level):
+        # wbits 31 writes the gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def process(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Brotli():
+    name = 'br'
+
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def process(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware():
+    """WSGI middleware compressing response bodies with brotli or gzip, as the client accepts
+
+    Brotli is preferred when the brotli package is installed and the client accepts br.
+    A body is compressed only when its content type is listed and it is at least
+    min_size bytes. For a streamed body the first chunks are held until min_size bytes
+    arrived (or the stream ended), then every chunk is compressed and flushed as soon as
+    it is read, so streaming still reaches the client progressively.
+
+    Attributes:
+        min_size: an integer of bytes a body needs to be compressed
+        gzip_level: an integer of the zlib compression level
+        brotli_quality: an integer of the brotli quality, low values suit dynamic responses
+        mimetypes: a tuple of the compressed content types
+    """
+
+    def __init__(self, app, min_size=1024, gzip_level=6, brotli_quality=4,
+                 mimetypes=('application/json', 'application/msgpack', 'text/plain', 'text/html', 'text/csv')):
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.mimetypes = mimetypes
+        self._counters = {'skipped': 0}
+        self._lock = threading.Lock()
+
+    def _encoder(self, environ):
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return None
+
+        accepted = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and accepted.quality('br') > 0:
+            return _Brotli(self.brotli_quality)
+        if accepted.quality('gzip') > 0:
+            return _Gzip(self.gzip_level)
+        return None
+
+    def _compressible(self, status, headers):
+        code = int(status.split(' ', 1)[0])
+        if code < 200 or code in (204, 206, 304):
+            return False
+
+        values = {key.lower(): value for key, value in headers}
+        if 'content-encoding' in values:
+            return False
+        if values.get('content-type', '').split(';')[0].strip() not in self.mimetypes:
+            return False
+
+        length = values.get('content-length')
+        return length is None or int(length) >= self.min_size
+
+    def _count(self, name, size_in=0, size_out=0):
+        with self._lock:
+            if name == 'skipped':
+                self._counters['skipped'] += 1
+                return
+            counter = self._counters.setdefault(name, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0})
+            counter['responses'] += 1
+            counter['bytes_in'] += size_in
+            counter['bytes_out'] += size_out
+
+    def stats(self):
+        """Get the counters of each encoding as a dict, with ratio as compressed / original bytes"""
+        with self._lock:
+            stats = {'skipped': self._counters['skipped']}
+            for name, counter in self._counters.items():
+                if name != 'skipped':
+                    ratio = counter['bytes_out'] / counter['bytes_in'] if counter['bytes_in'] else None
+                    stats[name] = dict(counter, ratio=ratio)
+            return stats
+
+    def __call__(self, environ, start_response):
+        encoder = self._encoder(environ)
+        if encoder is None:
+            return self.app(environ, start_response)
+
+        captured = []
+
+        def captureStartResponse(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return lambda data: None
+
+        body = self.app(environ, captureStartResponse)
+        return self._respond(body, captured, encoder, start_response)
+
+    def _respond(self, body, captured, encoder, start_response):
+        try:
+            chunks = iter(body)
+            buffered = []
+            size = 0
+            finished = True
+
+            # An app written as a generator calls start_response on its first iteration
+            if not captured:
+                for chunk in chunks:
+                    buffered.append(chunk)
+                    size += len(chunk)
+                    if captured:
+                        break
+            status, headers, exc_info = captured
+
+            compressible = self._compressible(status, headers)
+            if compressible:
+                for chunk in chunks:
+                    buffered.append(chunk)
+                    size += len(chunk)
+                    if size >= self.min_size:
+                        finished = False
+                        break
+
+                # A body of a known length is whole once that many bytes were read
+                length = [value for key, value in headers if key.lower() == 'content-length']
+                if length and size >= int(length[0]):
+                    finished = True
+
+            if not compressible or (finished and size < self.min_size):
+                self._count('skipped')
+                start_response(status, headers, exc_info)
+                yield from buffered
+                yield from chunks
+                return
+
+            headers = [(key, value) for key, value in headers if key.lower() != 'content-length']
+            vary = [value for key, value in headers if key.lower() == 'vary']
+            headers = [(key, value) for key, value in headers if key.lower() != 'vary']
+            headers.append(('Vary', ', '.join(vary + ['Accept-Encoding'])))
+            headers.append(('Content-Encoding', encoder.name))
+            # The compressed bytes differ from the original ones, so a strong ETag becomes weak
+            headers = [(key, 'W/' + value if key.lower() == 'etag' and not value.startswith('W/') else value)
+                       for key, value in headers]
+
+            if finished:
+                compressed = encoder.process(b''.join(buffered)) + encoder.finish()
+                headers.append(('Content-Length', str(len(compressed))))
+                self._count(encoder.name, size, len(compressed))
+                start_response(status, headers, exc_info)
+                yield compressed
+                return
+
+            start_response(status, headers, exc_info)
+            compressed = encoder.process(b''.join(buffered))
+            size_out = len(compressed)
+            yield compressed
+            for chunk in chunks:
+                size += len(chunk)
+                compressed = encoder.process(chunk)
+                size_out += len(compressed)
+                yield compressed
+            compressed = encoder.finish()
+            size_out += len(compressed)
+            self._count(encoder.name, size, size_out)
+            yield compressed
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
@@ -0,0 +1,80 @@
+from flask import request, Response
+from werkzeug.http import http_date, quote_etag
+from apps import app
+from .representations import negotiatedMimetype
+from sqlalchemy import func
+import hashlib
+
+
+def makeEtag(*parts):
+    """Digest the values a response depends on, and the mimetype it is sent as, into an ETag value (unquoted)
+
+    The JSON and MessagePack bodies of the same rows are different bytes, so each gets
+    its own strong ETag.
+    """
+    parts = (negotiatedMimetype(),) + parts
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def rowValidators(row):
+    """Get the (etag, last_modified) of a single row response from its id and updated_at"""
+    return makeEtag(row.__tablename__, row.id, row.updated_at), row.updated_at
+
+
+def listValidators(qry, model, *joined):
+    """Get the (etag, last_modified) of a list response with one aggregate query
+
+    The ETag covers the query arguments of the request and the count, max(updated_at)
+    and max(id) of the rows qry selects, so an insert, update or delete of one of them
+    changes it. Last-Modified only sees inserts and updates; clients that need to notice
+    deletes should send If-None-Match.
+
+    Args:
+        qry: a query of the rows of the list, filtered but not ordered or paged
+        model: the model class of the rows
+        joined: the model classes qry joins, the max(updated_at) of their joined rows
+            is covered too
+    """
+    row = qry.with_entities(
+        func.count(model.id), func.max(model.updated_at), func.max(model.id),
+        *[func.max(other.updated_at) for other in joined]).one()
+    count, last_modified, last_id = row[:3]
+    for other_modified in row[3:]:
+        if other_modified is not None and (last_modified is None or other_modified > last_modified):
+            last_modified = other_modified
+    args = sorted(request.args.items(multi=True))
+    return makeEtag(model.__tablename__, args, count, last_modified, last_id), last_modified
+
+
+def cacheHeaders(headers, etag, last_modified):
+    """Add ETag, Last-Modified and Cache-Control to a dict of response headers
+
+    The same rows are sent as JSON or MessagePack, as the Accept header asks, so caches
+    are told to vary on it.
+    """
+    headers = dict(headers, ETag=quote_etag(etag), Vary='Accept')
+    headers['Cache-Control'] = app.config['CATALOG_CACHE_CONTROL']
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+    return headers
+
+
+def notModified(etag, last_modified):
+    """Answer a conditional GET whose validators still match
+
+    If-None-Match is used when the request sends it, If-Modified-Since otherwise.
+
+    Returns:
+        A bare 304 Response, so nothing is marshalled, or None when the body has to be sent.
+    """
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since is not None and last_modified is not None:
+        # HTTP dates have no fraction of a second
+        matched = last_modified.replace(microsecond=0) <= request.if_modified_since
+    else:
+        matched = False
+
+    if not matched:
+        return None
+    return Response(status=304, headers=cacheHeaders({}, etag, last_modified))
@@ -13,14 +13,15 @@ class Conditions(db.Model):
         created_at: a datetime that indicates when the row created
         updated_at: a datetime that indicates when the row last updated
         response_field: a dictionary that will be used to be a guide when extracting data from database's field
+        list_options: a dictionary of the filters, sort keys and page size the list endpoint accepts
     """
     __tablename__ = "conditions"
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    condition = db.Column(db.String(50), nullable=False)
+    condition = db.Column(db.String(50), nullable=False, index=True)
     details = db.Column(db.String(100), nullable=True)
     created_at = db.Column(db.DateTime,  default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime,  default=db.func.current_timestamp(
-    ), onupdate=db.func.current_timestamp())
+    ), onupdate=db.func.current_timestamp(), index=True)
 
     response_fields = {
         'id': fields.Integer,
@@ -28,6 +29,11 @@ class Conditions(db.Model):
         'details': fields.String,
     }
 
+    list_options = {
+        'sort_keys': ('id', 'condition'),
+        'max_rp': 100,
+    }
+
     def __init__(self, data):
         """Inits Conditions with data that user/admin inputted
 
@@ -4,9 +4,17 @@ from .model import Conditions
 from apps import app, db, adminRequired, nonAdminRequired, jwtRequired
 from flask_jwt_extended import jwt_required, get_jwt_claims
 from ..commons import cors_value, cors_status, content_type_json
+from ..listing import ListEngine
+from ..representations import registerRepresentations
+from ..conditional import rowValidators, cacheHeaders, notModified
+from ..changes.model import Tombstones
+from ..autocomplete.index import autocomplete
+from ..response_cache import response_cache
 
 bp_conditions = Blueprint('conditions', __name__)
 api = Api(bp_conditions)
+registerRepresentations(api)
+conditions_list = ListEngine(Conditions, cache=response_cache)
 
 
 class ConditionsResource(Resource):
@@ -55,6 +63,8 @@ class ConditionsResource(Resource):
         condition = Conditions(new_condition)
         db.session.add(condition)
         db.session.commit()
+        response_cache.invalidate('conditions')
+        autocomplete.upsert('condition', condition.id, condition.condition)
 
         app.logger.debug('DEBUG : %s', condition)
 
@@ -73,10 +83,25 @@ class ConditionsResource(Resource):
                 "details": "Pijat Bayi untuk Umur 2 Tahun",
             }
 
+        The response carries the ETag and Last-Modified of the row, a request whose
+        If-None-Match or If-Modified-Since still matches gets 304 Not Modified.
         """
-        condition = Conditions.query.get(id)
+        cached, ticket = response_cache.get('conditions', id)
+        if cached is None:
+            condition = Conditions.query.get(id)
+            if condition is None:
+                return marshal(condition, Conditions.response_fields), 200, content_type_json
 
-        return marshal(condition, Conditions.response_fields), 200, {'Content_Type': 'application/json'}
+            etag, last_modified = rowValidators(condition)
+            cached = (marshal(condition, Conditions.response_fields), cacheHeaders(content_type_json, etag, last_modified), etag, last_modified)
+            response_cache.set(ticket, cached)
+
+        body, headers, etag, last_modified = cached
+        not_modified = notModified(etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        return body, 200, headers
 
     # @adminRequired
     def put(self, id):
@@ -114,12 +139,14 @@ class ConditionsResource(Resource):
             condition.details = args['details']
 
         db.session.commit()
+        response_cache.invalidate('conditions', id)
+        autocomplete.upsert('condition', condition.id, condition.condition)
 
         return marshal(condition, Conditions.response_fields), 200, {'Content_Type': 'application/json'}
 
     # @adminRequired
     def delete(self, id):
-        """Hard delete a single record from conditions table 
+        """Hard delete a single record from conditions table, leaving a tombstone for the changes endpoint
         Args (located in function's parameter): 
             id: An integer of condition's id which want to be deleted
         Returns:
@@ -134,7 +161,10 @@ class ConditionsResource(Resource):
             return {'status': 'Not Found'}, 404, {'Content_Type': 'application/json'}
 
         db.session.delete(condition)
+        db.session.add(Tombstones({'table_name': Conditions.__tablename__, 'row_id': condition.id}))
         db.session.commit()
+        response_cache.invalidate('conditions', id)
+        autocomplete.remove('condition', id)
         return {"Status": "The data with id {} is deleted".format(id)}, 200, {'Content_Type': 'application/json'}
 
 
@@ -151,6 +181,11 @@ class ConditionsList(Resource):
     def get(self):
         """Get all category's data from conditions table
 
+            Pages are read with the opaque cursor of the Link header (rel="next"/"prev"),
+            which seeks past the last row instead of counting OFFSET rows. p still works
+            for clients that do not follow the links. The accepted filters, orderby values
+            and largest rp are declared in Conditions.list_options.
+
             Returns : An array of dictionary contains all data from users. Example :
             [
                 {   
@@ -167,30 +202,9 @@ class ConditionsList(Resource):
 
             Raise:
               Forbidden(403): An error occured when standard user try to access this method.  
+              Bad Request(400): An error occured when the filters and orderby are not served by one index, or the cursor is invalid
         """
-        parser = reqparse.RequestParser()
-        parser.add_argument('p', type=int, location='args', default=1)
-        parser.add_argument('rp', type=int, location='args', default=25)
-        parser.add_argument('orderby', location='args', choices=('id'))
-        parser.add_argument('sort', location='args', choices=('asc', 'desc'))
-        args = parser.parse_args()
-
-        offset = (args['p'] * args['rp']) - args['rp']
-
-        qry = Conditions.query
-
-        if args['orderby'] is not None:
-            if args['orderby'] == 'id':
-                if args['sort'] == 'desc':
-                    qry = qry.order_by(desc(Conditions.id)) 
-                else:
-                    qry = qry.order_by((Conditions.id))
-
-        rows = []
-        for row in qry.limit(args['rp']).offset(offset).all():
-            rows.append(marshal(row, Conditions.response_fields))
-
-        return rows, 200, {'Content-Type': 'application/json'}
+        return conditions_list.get()
 
 api.add_resource(ConditionsResource, '', '/<id>')
 api.add_resource(ConditionsList, '/list')
@@ -0,0 +1,46 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+
+def fieldsType(response_fields):
+    """Build the reqparse type of a fields= argument, a comma separated subset of response_fields
+
+    The parsed value is a tuple of the field names in the order they were asked for,
+    reqparse answers 400 when one of them is not in response_fields.
+    """
+    def fields(value):
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        if not names:
+            raise ValueError('fields must name at least one field')
+
+        unknown = [name for name in names if name not in response_fields]
+        if unknown:
+            raise ValueError('unknown fields: {}'.format(', '.join(unknown)))
+
+        return tuple(dict.fromkeys(names))
+    return fields
+
+
+def sparseFields(response_fields, names):
+    """Trim response_fields to names, keeping the order of response_fields. None keeps them all"""
+    if names is None:
+        return response_fields
+    return {key: value for key, value in response_fields.items() if key in names}
+
+
+def loadOnly(model, names, *required):
+    """Build a query option that loads only the columns of names and required
+
+    Args:
+        model: a model class
+        names: an iterable of response field names, None loads every column
+        required: column names the caller reads besides the marshalled ones, such as the sort key
+
+    Returns:
+        A load_only option, or None when every column is loaded
+    """
+    if names is None:
+        return None
+
+    columns = inspect(model).column_attrs.keys()
+    return load_only(*[name for name in columns if name in names or name in required])
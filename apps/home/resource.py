@@ -0,0 +1,121 @@
+from flask import Blueprint
+from flask_restful import Resource, Api
+from concurrent.futures import ThreadPoolExecutor
+from apps import app, jwtRequired
+from flask_jwt_extended import get_jwt_claims
+from ..commons import cors_value, cors_status, content_type_json
+from ..representations import registerRepresentations
+from ..serializers import serializer
+import time
+
+from apps.categories.model import Categories
+from apps.user_conditions.model import UserConditions
+from apps.users.cache import getProfile, getUserInfo
+
+bp_home = Blueprint('home', __name__)
+api = Api(bp_home)
+registerRepresentations(api)
+
+# Shared by every request, each section runs in its own thread with its own app context and session
+fanout = ThreadPoolExecutor(max_workers=app.config['HOME_FANOUT_WORKERS'])
+
+
+def _firstCategories():
+    """Get the first page of /v1/category/list"""
+    return list(map(serializer(Categories.response_fields), Categories.query.order_by(Categories.id).limit(25)))
+
+
+def _runSection(load, *args):
+    # Popping the app context removes this thread's scoped session
+    with app.app_context():
+        return load(*args)
+
+
+class HomeResource(Resource):
+    """Class for storing HTTP request method for the data the app needs on launch"""
+
+    def __init__(self):
+        pass
+
+    def options(self):
+        """Flask-CORS function to make Flask allowing our apps to support cross origin resource sharing (CORS)"""
+        return cors_value, cors_status
+
+    @jwtRequired
+    def get(self):
+        """Get the user, user info, user conditions and categories of the app home screen in one request
+
+        The four sections are read concurrently. A section that fails, or is not done
+        HOME_SECTION_TIMEOUT seconds after the request started, is left null and its
+        error is listed in errors, the other sections are still returned.
+
+        Returns:
+            A dict of every section, for example:
+
+            {
+                "user": {
+                    "id": 1,
+                    "name": "user",
+                    "email": "user@mail.com",
+                    "phone_number": "08111111111",
+                    "role": 0
+                },
+                "user_info": {
+                    "id": 1,
+                    "address": "Banyumas",
+                    "photo": "https://blabla.com",
+                    "birthdate": "24051998",
+                    "weight": 50,
+                    "height": 60
+                },
+                "user_conditions": [
+                    {
+                        "id": 4,
+                        "user_id": 1,
+                        "condition_id": 3,
+                        "condition": "Yakin sudah minum berat?",
+                        "condition_details": "Minum air",
+                        "user_answer": "Ya belom"
+                    }
+                ],
+                "categories": [
+                    {
+                        "id": 1,
+                        "name": "Pijat Bayi",
+                        "details": "Pijat Bayi untuk Umur 2 Tahun"
+                    }
+                ],
+                "errors": {}
+            }
+
+        Raise:
+            Service Unavailable(503): An error occured when every section failed
+        """
+        claims = get_jwt_claims()
+
+        sections = {
+            'user': fanout.submit(_runSection, getProfile, claims['id']),
+            'user_info': fanout.submit(_runSection, getUserInfo, claims['id']),
+            'user_conditions': fanout.submit(_runSection, UserConditions.latestForUser, claims['id']),
+            'categories': fanout.submit(_runSection, _firstCategories),
+        }
+
+        # One deadline for every section, so the request waits HOME_SECTION_TIMEOUT at most
+        deadline = time.monotonic() + app.config['HOME_SECTION_TIMEOUT']
+        result = {}
+        errors = {}
+        for name, future in sections.items():
+            try:
+                result[name] = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except Exception as e:
+                app.logger.exception('home section %s failed', name)
+                result[name] = None
+                errors[name] = str(e) or type(e).__name__
+
+        result['errors'] = errors
+        if len(errors) == len(sections):
+            return result, 503, content_type_json
+
+        return result, 200, content_type_json
+
+api.add_resource(HomeResource, '')
@@ -0,0 +1,167 @@
+from flask_restful import reqparse
+from sqlalchemy import UniqueConstraint
+from .commons import content_type_json
+from .conditional import listValidators, cacheHeaders, notModified
+from .pagination import paginate
+from .fieldsets import fieldsType, sparseFields, loadOnly
+from .serializers import serializer
+
+
+class ListEngine():
+    """Class for serving the list endpoint of a model from its list_options
+
+    The model declares which query arguments its list accepts as a class attribute:
+
+        list_options = {
+            'filters': ('provider_id', 'category_id'),
+            'sort_keys': ('id', 'price'),
+            'max_rp': 100,
+        }
+
+    filters are column names matched by equality, sort_keys are the column names orderby
+    accepts and max_rp is the largest page size. Every filter and sort key on its own
+    must be served by an index of the table, or the engine refuses to build. A request
+    combining filters with a sort key is answered only when one index covers the filters
+    followed by the sort key, so no list query falls back to a sort of the whole table.
+
+    A list that also returns columns of other tables passes a query joining them, the
+    response_fields reading them and those models as joined. The filters and sort keys
+    stay columns of model, so the rows are still found and paged through its indexes.
+
+    Attributes:
+        model: a model class with response_fields and list_options
+        cache: a ResponseCache the pages are kept in until the table is written, or None
+        response_fields: a dict of the fields each row is serialized with, model.response_fields by default
+        query: a function returning the query of the rows, model.query by default
+        joined: a tuple of the other model classes in the query, their writes change the ETag too
+        filters: a dict mapping a filter name to its column
+        sort_keys: a dict mapping an orderby value to its column
+        max_rp: an integer of the largest page size
+    """
+
+    def __init__(self, model, cache=None, list_options=None, response_fields=None, query=None, joined=()):
+        options = list_options if list_options is not None else model.list_options
+        self.model = model
+        self.cache = cache
+        self.response_fields = response_fields if response_fields is not None else model.response_fields
+        self.query = query if query is not None else (lambda: model.query)
+        self.joined = joined
+        self.filters = {name: getattr(model, name) for name in options.get('filters', ())}
+        self.sort_keys = {name: getattr(model, name) for name in options.get('sort_keys', ('id',))}
+        self.max_rp = options.get('max_rp', 100)
+
+        table = model.__table__
+        self._primary_key = tuple(column.name for column in table.primary_key.columns)
+        self._indexes = [self._primary_key]
+        # A FULLTEXT index can not serve equality filters or sorting
+        self._indexes += [tuple(column.name for column in index.columns) for index in table.indexes
+                          if index.dialect_kwargs.get('mysql_prefix') != 'FULLTEXT']
+        self._indexes += [tuple(column.name for column in constraint.columns)
+                          for constraint in table.constraints if isinstance(constraint, UniqueConstraint)]
+
+        for name in self.sort_keys:
+            if not self.isIndexed((), name):
+                raise ValueError('{}: sort key {} has no index'.format(table.name, name))
+        for name in self.filters:
+            if not self.isIndexed((name,), 'id'):
+                raise ValueError('{}: filter {} has no index'.format(table.name, name))
+
+    def isIndexed(self, filters, sort_key):
+        """Check whether one index serves equality filters followed by a sort key
+
+        Args:
+            filters: an iterable of filtered column names
+            sort_key: a column name the rows are sorted by
+
+        Returns:
+            True when an index starts with the filtered columns (in any order) followed by
+            the sort key. Secondary indexes end with the primary key, so sorting by id
+            only needs an index of exactly the filtered columns.
+        """
+        filters = set(filters)
+        for columns in self._indexes:
+            if set(columns[:len(filters)]) != filters:
+                continue
+            rest = columns[len(filters):]
+            if (sort_key,) == self._primary_key and rest in ((), self._primary_key):
+                return True
+            if rest and rest[0] == sort_key:
+                return True
+        return False
+
+    def _pageSize(self, value):
+        value = int(value)
+        if value < 1 or value > self.max_rp:
+            raise ValueError('rp must be between 1 and {}'.format(self.max_rp))
+        return value
+
+    def parser(self):
+        """Build the request parser of the list arguments"""
+        parser = reqparse.RequestParser()
+        parser.add_argument('p', type=int, location='args', default=1)
+        parser.add_argument('rp', type=self._pageSize, location='args', default=min(25, self.max_rp))
+        parser.add_argument('cursor', location='args')
+        parser.add_argument('orderby', location='args', choices=tuple(self.sort_keys), default='id')
+        parser.add_argument('sort', location='args', choices=('asc', 'desc'), default='asc')
+        parser.add_argument('fields', type=fieldsType(self.response_fields), location='args')
+        for name, column in self.filters.items():
+            parser.add_argument(name, type=column.type.python_type, location='args')
+        return parser
+
+    def get(self):
+        """Answer a list request
+
+        Returns:
+            A (body, status, headers) tuple with the Link header of the page and the ETag
+            and Last-Modified of the rows. The rows are serialized with the model's
+            response_fields, trimmed to the fields= argument when it is given. The body
+            is a list: a page holds at most max_rp rows, and its Link header needs the
+            last of them before the body is written, so the page is read whole rather
+            than streamed. A message with status 400 is returned when the filters and
+            sort key are not served by one index, or when the cursor is malformed. A
+            request whose validators still match gets a bare 304 Response instead.
+        """
+        if self.cache is not None:
+            cached, ticket = self.cache.get(self.model.__tablename__)
+            if cached is not None:
+                rows, headers, etag, last_modified = cached
+                not_modified = notModified(etag, last_modified)
+                if not_modified is not None:
+                    return not_modified
+                return rows, 200, headers
+
+        args = self.parser().parse_args()
+
+        filters = {name: args[name] for name in self.filters if args[name] is not None}
+        if not self.isIndexed(filters, args['orderby']):
+            return {'message': 'Sorting by {} with the filters {} is not supported'.format(
+                args['orderby'], ', '.join(sorted(filters)))}, 400, content_type_json
+
+        sort_column = self.sort_keys[args['orderby']]
+        qry = self.query()
+        for name, value in filters.items():
+            qry = qry.filter(self.filters[name] == value)
+
+        etag, last_modified = listValidators(qry, self.model, *self.joined)
+        not_modified = notModified(etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        # Only the asked fields, plus the keys the cursors are made of, are read and marshalled
+        response_fields = sparseFields(self.response_fields, args['fields'])
+        columns = loadOnly(self.model, args['fields'], 'id', sort_column.key)
+        if columns is not None:
+            qry = qry.options(columns)
+
+        try:
+            page = paginate(qry, sort_column, self.model.id,
+                            args['sort'] == 'desc', args['rp'], args['cursor'], args['p'])
+        except ValueError:
+            return {'message': 'Invalid cursor'}, 400, content_type_json
+
+        headers = page.headers(cacheHeaders(content_type_json, etag, last_modified))
+        rows = list(map(serializer(response_fields), page.rows))
+        if self.cache is not None:
+            self.cache.set(ticket, (rows, headers, etag, last_modified))
+
+        return rows, 200, headers
@@ -0,0 +1,63 @@
+from flask import Blueprint
+from flask_restful import Resource, Api
+from apps import adminRequired, response_compression
+from apps.caching import registry
+from ..commons import cors_value, cors_status, content_type_json
+from ..representations import registerRepresentations
+
+bp_metrics = Blueprint('metrics', __name__)
+api = Api(bp_metrics)
+registerRepresentations(api)
+
+
+class MetricsResource(Resource):
+    """Class for storing HTTP request method for the runtime metrics of this server worker, accessed by admin"""
+
+    def __init__(self):
+        pass
+
+    def options(self):
+        """Flask-CORS function to make Flask allowing our apps to support cross origin resource sharing (CORS)"""
+        return cors_value, cors_status
+
+    @adminRequired
+    def get(self):
+        """Get the counters of every registered cache and of the response compression
+
+        Each server worker keeps its own caches, so the counters are those of the worker
+        that answered.
+
+        Returns:
+            A dict of the stats of each cache by name and of each content encoding, where
+            ratio is compressed bytes / original bytes. For example:
+
+            {
+                "caches": {
+                    "response_cache": {
+                        "size": 12,
+                        "maxsize": 1024,
+                        "hits": 930,
+                        "misses": 41,
+                        "evictions": 0,
+                        "invalidations": 3
+                    }
+                },
+                "compression": {
+                    "skipped": 120,
+                    "gzip": {
+                        "responses": 85,
+                        "bytes_in": 1830400,
+                        "bytes_out": 201344,
+                        "ratio": 0.11
+                    }
+                }
+            }
+
+        Raise:
+            Forbidden(403): An error occured when non admin user try to access this method.
+        """
+        caches = {name: cache.stats() for name, cache in registry.items()}
+        return {'caches': caches, 'compression': response_compression.stats()}, 200, content_type_json
+
+
+api.add_resource(MetricsResource, '')
@@ -0,0 +1,180 @@
+from flask import request
+from sqlalchemy import and_, or_
+from werkzeug.urls import url_encode
+import base64
+import json
+
+
+def encodeToken(data):
+    """Encode a JSON serializable value into an opaque url-safe token"""
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decodeToken(token):
+    """Decode a token made by encodeToken. Raises ValueError when it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        return json.loads(raw.decode('utf-8'))
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('invalid cursor')
+
+
+def encodeCursor(direction, values):
+    """Encode a page position into an opaque url-safe token
+
+    Args:
+        direction: a string, 'next' for the rows after values or 'prev' for the rows before them
+        values: a list of the (sort key, id) of the row the page starts after
+    """
+    return encodeToken([direction, values])
+
+
+def decodeCursor(token):
+    """Decode a token made by encodeCursor into (direction, values). Raises ValueError when it is malformed"""
+    data = decodeToken(token)
+    if not isinstance(data, list) or len(data) != 2:
+        raise ValueError('invalid cursor')
+
+    direction, values = data
+    if direction not in ('next', 'prev') or not isinstance(values, list) or len(values) != 2:
+        raise ValueError('invalid cursor')
+
+    return direction, values
+
+
+class Page():
+    """Class for one page of rows and the cursors around it
+
+    Attributes:
+        rows: a list of the rows of the page
+        next: a string cursor of the page after this one, None on the last page
+        prev: a string cursor of the page before this one, None on the first page
+    """
+
+    def __init__(self, rows, next_cursor, prev_cursor):
+        self.rows = rows
+        self.next = next_cursor
+        self.prev = prev_cursor
+
+    def links(self):
+        """Get the next/prev links of the page as a Link header value, or None when there is no other page"""
+        args = request.args.to_dict()
+        args.pop('p', None)
+
+        links = []
+        for rel, cursor in (('next', self.next), ('prev', self.prev)):
+            if cursor is not None:
+                args['cursor'] = cursor
+                links.append('<{}?{}>; rel="{}"'.format(request.base_url, url_encode(args), rel))
+
+        return ', '.join(links) or None
+
+    def headers(self, headers):
+        """Add the Link header of the page to a dict of response headers"""
+        links = self.links()
+        if links is not None:
+            headers = dict(headers, Link=links)
+        return headers
+
+
+def seek(sort_column, id_column, values, forward):
+    """Filter for the rows strictly after (or before) values in (sort_column, id_column) order
+
+    Written as "sort >= x AND (sort > x OR id > y)" so the leading condition stays an index range.
+    """
+    sort_value, id_value = values
+    if sort_column is id_column:
+        return id_column > id_value if forward else id_column < id_value
+
+    if forward:
+        return and_(sort_column >= sort_value, or_(sort_column > sort_value, id_column > id_value))
+    return and_(sort_column <= sort_value, or_(sort_column < sort_value, id_column < id_value))
+
+
+def paginate(qry, sort_column, id_column, descending, limit, cursor=None, page=None):
+    """Get one page of a query ordered by (sort_column, id_column)
+
+    With a cursor, the page is found by seeking past the last row of the previous page,
+    so page 10,000 costs the same as page 1. Without a cursor, page (the old p
+    parameter) falls back to OFFSET.
+
+    Rows whose nullable sort_column is NULL come after every other row, in either
+    direction, ordered by id_column. They are read as a second segment, "sort IS NULL"
+    ordered by id, so each query stays an index range. A cursor inside that segment
+    carries None as its sort key.
+
+    Args:
+        qry: a query of the rows to page through, without order or limit
+        sort_column: a column the rows are sorted by. May be id_column itself
+        id_column: the primary key column, it breaks ties between equal sort keys
+        descending: a boolean, True sorts from the greatest key
+        limit: an integer of rows per page
+        cursor: a string made by encodeCursor, or None for the first page
+        page: an integer of the old p parameter, used only without a cursor
+
+    Returns:
+        A Page. Raises ValueError when the cursor is malformed.
+    """
+    limit = max(limit, 1)
+    nullable = sort_column is not id_column and sort_column.nullable
+
+    def key(row):
+        return [getattr(row, sort_column.key), getattr(row, id_column.key)]
+
+    def ordered(qry, reverse, columns):
+        if descending != reverse:
+            return qry.order_by(*[column.desc() for column in columns])
+        return qry.order_by(*columns)
+
+    def segment(nulls, values, reverse, count):
+        # The rows of one segment after values, or before them when reverse
+        rows, column = qry, sort_column
+        if nulls:
+            rows, column = qry.filter(sort_column.is_(None)), id_column
+        elif nullable:
+            rows = qry.filter(sort_column.isnot(None))
+        if values is not None:
+            rows = rows.filter(seek(column, id_column, values, reverse == descending))
+        columns = [column, id_column] if column is not id_column else [id_column]
+        return ordered(rows, reverse, columns).limit(count).all()
+
+    if cursor is None and page is not None and page > 1:
+        columns = [sort_column, id_column] if sort_column is not id_column else [id_column]
+        order = [column.desc() if descending else column for column in columns]
+        if nullable:
+            # NULL sort keys last, like the cursor pages
+            order.insert(0, sort_column.is_(None))
+        rows = qry.order_by(*order).limit(limit + 1).offset((page - 1) * limit).all()
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        return Page(
+            rows,
+            encodeCursor('next', key(rows[-1])) if has_next else None,
+            encodeCursor('prev', key(rows[0])) if rows else None)
+
+    direction, values = decodeCursor(cursor) if cursor is not None else ('next', None)
+    forward = direction == 'next'
+    in_nulls = nullable and values is not None and values[0] is None
+
+    # Forward reads on from the non-NULL segment into the NULL one, backward the other way round
+    rows = segment(in_nulls, values, not forward, limit + 1)
+    if nullable and len(rows) <= limit and in_nulls != forward:
+        rows += segment(forward, None, not forward, limit + 1 - len(rows))
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not forward:
+        rows.reverse()
+
+    if not rows:
+        return Page(rows, None, None)
+
+    if forward:
+        next_cursor = encodeCursor('next', key(rows[-1])) if has_more else None
+        prev_cursor = encodeCursor('prev', key(rows[0])) if values is not None else None
+    else:
+        next_cursor = encodeCursor('next', key(rows[-1]))
+        prev_cursor = encodeCursor('prev', key(rows[0])) if has_more else None
+
+    return Page(rows, next_cursor, prev_cursor)
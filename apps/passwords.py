@@ -0,0 +1,149 @@
+from apps import app
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from passlib.hash import sha256_crypt
+import os
+import threading
+
+
+class HashingBusy(Exception):
+    """Raised when no hashing slot frees up before PASSWORD_HASH_QUEUE_TIMEOUT runs out"""
+    pass
+
+
+def _hash(password, rounds):
+    """Hash a password with the given sha256_crypt rounds. Runs inside a pool worker."""
+    return sha256_crypt.using(rounds=rounds).hash(password)
+
+
+def _hashMany(passwords, rounds):
+    """Hash a chunk of passwords. Runs inside a pool worker."""
+    hasher = sha256_crypt.using(rounds=rounds)
+    return [hasher.hash(password) for password in passwords]
+
+
+def _verify(password, hashed, rounds):
+    """Verify a password against its hash. Runs inside a pool worker.
+
+    When the password matches but the stored hash was made with a different rounds
+    policy, the password is rehashed in the same call so the caller can store it.
+
+    Returns:
+        A tuple of (is_valid, new_hash). new_hash is None when no upgrade is needed.
+    """
+    if not sha256_crypt.verify(password, hashed):
+        return False, None
+
+    hasher = sha256_crypt.using(rounds=rounds)
+    if hasher.needs_update(hashed):
+        return True, hasher.hash(password)
+
+    return True, None
+
+
+class PasswordHasher():
+    """Class for running sha256_crypt hashing and verification off the request thread
+
+    Every call is sent to a process pool, so a burst of logins no longer holds the GIL
+    and starves the other endpoints. The number of jobs waiting for the pool is bounded;
+    when every slot stays taken for longer than the queue timeout, HashingBusy is raised.
+
+    Attributes:
+        rounds: an integer of sha256_crypt rounds used for new hashes
+        workers: an integer of pool processes. 0 hashes inline on the calling thread
+        queue_size: an integer of jobs allowed to be submitted to the pool at once
+        timeout: a float of seconds to wait for a free slot before giving up
+    """
+
+    def __init__(self, rounds, workers, queue_size, timeout):
+        self.rounds = rounds
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+
+    def _executor(self):
+        """Get the process pool, creating it lazily in each forked server worker"""
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+        return self._pool
+
+    def _run(self, fn, *args):
+        if self.workers == 0:
+            return fn(*args)
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HashingBusy()
+        try:
+            return self._executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        """Hash a password using the configured rounds"""
+        return self._run(_hash, password, self.rounds)
+
+    def hashMany(self, passwords, chunk_size=16):
+        """Hash a list of passwords across every pool worker, keeping their order
+
+        Chunks are submitted one at a time per worker and each holds a queue slot, so
+        logins still get their turn on the pool while a long list is being hashed. Like
+        a single hash, HashingBusy is raised when a slot stays taken for longer than the
+        queue timeout; the slots of the chunks already submitted are given back.
+        """
+        chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+        if self.workers == 0:
+            return [hashed for chunk in chunks for hashed in _hashMany(chunk, self.rounds)]
+
+        hashed = []
+        pending = deque()
+
+        def collect(future):
+            try:
+                hashed.extend(future.result())
+            finally:
+                self._slots.release()
+
+        try:
+            for chunk in chunks:
+                if len(pending) >= self.workers:
+                    collect(pending.popleft())
+                if not self._slots.acquire(timeout=self.timeout):
+                    raise HashingBusy()
+                pending.append(self._executor().submit(_hashMany, chunk, self.rounds))
+            while pending:
+                collect(pending.popleft())
+        finally:
+            for future in pending:
+                future.cancel()
+                self._slots.release()
+
+        return hashed
+
+    def verify(self, password, hashed):
+        """Verify a password against its stored hash
+
+        Returns:
+            A tuple of (is_valid, new_hash). new_hash holds a hash made with the current
+            rounds when the stored one is outdated, otherwise None.
+        """
+        return self._run(_verify, password, hashed, self.rounds)
+
+    def shutdown(self):
+        """Stop the pool processes owned by this server worker"""
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.shutdown()
+            self._pool = None
+
+
+hasher = PasswordHasher(
+    app.config['PASSWORD_HASH_ROUNDS'],
+    app.config['PASSWORD_HASH_WORKERS'],
+    app.config['PASSWORD_HASH_QUEUE_SIZE'],
+    app.config['PASSWORD_HASH_QUEUE_TIMEOUT'])
@@ -16,7 +16,9 @@ class ProviderCertifications(db.Model):
         details: a string that explains the certification.
         created_at: a datetime that indicates when the row created
         updated_at: a datetime that indicates when the row last updated
+        certification: the Certifications row of certification_id, loaded only when a query asks for it
         response_field: a dictionary that will be used to be a guide when extracting data from database's field
+        profile_fields: a dictionary like response_field, with the certification fields a provider profile shows
     """
     __tablename__ = "provider_certifications"
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
@@ -30,6 +32,8 @@ class ProviderCertifications(db.Model):
     updated_at = db.Column(db.DateTime,  default=db.func.current_timestamp(
     ), onupdate=db.func.current_timestamp())
 
+    certification = db.relationship('Certifications', lazy='raise')
+
     response_fields = {
         'id': fields.Integer,
         'certification_id': fields.Integer,
@@ -40,6 +44,20 @@ class ProviderCertifications(db.Model):
         'details': fields.String,
     }
 
+    profile_fields = {
+        'id': fields.Integer,
+        'certification_id': fields.Integer,
+        'certification_number': fields.String,
+        'date_issued': fields.String,
+        'date_expired': fields.String,
+        'details': fields.String,
+        'certification': fields.Nested({
+            'id': fields.Integer,
+            'name': fields.String,
+            'issuer': fields.String,
+        }),
+    }
+
     def __init__(self, data):
         """Inits ProviderCertifications with data that user inputted
 
@@ -20,20 +20,25 @@ class Providers(db.Model):
         created_at: a datetime that indicates when the account created
         updated_at: a datetime that indicates when the account last updated
         response_field: a dictionary that will be used to be a guide when extracting data from database's field
+        list_options: a dictionary of the filters, sort keys and page size the list endpoint accepts
     """
     __tablename__ = "providers"
+    __table_args__ = (
+        db.Index('ix_providers_role_name', 'role', 'name'),
+        db.Index('ft_providers_text', 'name', 'role', 'almamater', 'details', mysql_prefix='FULLTEXT'),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), unique=True, nullable=False)
-    name = db.Column(db.String(50), nullable=False)
+    name = db.Column(db.String(50), nullable=False, index=True)
     birthday = db.Column(db.String(30), nullable=False)
     experience = db.Column(db.String(30), nullable=False)
     almamater = db.Column(db.String(30), nullable=False)
     details = db.Column(db.String(30), nullable=False)
-    role = db.Column(db.String(30), nullable=False)
+    role = db.Column(db.String(30), nullable=False, index=True)
     permit_number = db.Column(db.String(100), nullable=False)
     created_at = db.Column(db.DateTime,  default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime,  default=db.func.current_timestamp(
-    ), onupdate=db.func.current_timestamp())
+    ), onupdate=db.func.current_timestamp(), index=True)
 
     response_fields = {
         'id': fields.Integer,
@@ -47,6 +52,12 @@ class Providers(db.Model):
         'permit_number': fields.String,
     }
 
+    list_options = {
+        'filters': ('user_id', 'role'),
+        'sort_keys': ('id', 'name'),
+        'max_rp': 100,
+    }
+
     def __init__(self, data):
         """Inits Providers with data that user/admin inputted
 
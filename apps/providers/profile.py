@@ -0,0 +1,158 @@
+from datetime import date
+from sqlalchemy import event, inspect, or_
+from sqlalchemy.orm import contains_eager
+from apps import app, db
+from apps.caching import LRUCache, registerCache
+from apps.categories.model import Categories
+from apps.certifications.model import Certifications
+from apps.provider_certifications.model import ProviderCertifications
+from apps.schedule.model import Schedules
+from apps.services.model import Services
+from ..serializers import serializer
+from .model import Providers
+import threading
+
+# The rows a profile is assembled from, and the column telling which provider a row belongs to
+profile_sources = {
+    Providers: 'id',
+    Services: 'provider_id',
+    ProviderCertifications: 'provider_id',
+    Schedules: 'provider_id',
+}
+
+# Rows shared by many providers, a write to one of them drops every profile
+profile_shared = (Categories, Certifications)
+
+
+class ProfileCache():
+    """Class for caching the assembled profile of each provider until one of its rows is written
+
+    A profile holds rows of several tables, and the certifications and schedules tables
+    are also written outside the resources. So the profiles are not dropped by the
+    resources but by session events: every flush notes the providers whose rows it
+    wrote, and their profiles are dropped once the transaction commits. A profile read
+    while any of them was being written is not cached. Each server worker keeps its own
+    cache, so profiles also expire after the TTL for the writes another worker served.
+
+    Attributes:
+        invalidations: an integer of invalidate() calls
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.invalidations = 0
+        self._cache = LRUCache(maxsize, ttl)
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, provider_id):
+        """Look up the cached profile of a provider for today
+
+        Returns:
+            A (profile, ticket) tuple, profile is None on a miss. The ticket is passed to
+            set() so a profile read while it was written is not cached.
+        """
+        today = date.today().isoformat()
+        with self._lock:
+            writes = self._writes
+        entry = self._cache.get(provider_id)
+        # The upcoming schedules change with the date, so a profile is kept for its day only
+        profile = entry[1] if entry is not None and entry[0] == today else None
+        return profile, (provider_id, today, writes)
+
+    def set(self, ticket, profile):
+        """Cache a profile under the ticket get() returned, unless a profile was dropped since"""
+        provider_id, today, writes = ticket
+        with self._lock:
+            if self._writes == writes:
+                self._cache.set(provider_id, (today, profile))
+
+    def invalidate(self, provider_ids=None):
+        """Drop the profiles of provider_ids, or every profile when it is None"""
+        with self._lock:
+            self._writes += 1
+            self.invalidations += 1
+            if provider_ids is None:
+                self._cache.clear()
+            else:
+                for provider_id in provider_ids:
+                    self._cache.delete(provider_id)
+
+    def stats(self):
+        """Get the cache counters as a dict"""
+        return dict(self._cache.stats(), invalidations=self.invalidations)
+
+
+provider_profile_cache = registerCache('provider_profile_cache', ProfileCache(app.config['PROVIDER_PROFILE_CACHE_SIZE'], app.config['PROVIDER_PROFILE_CACHE_TTL']))
+
+
+def _writtenProviders(session):
+    written = session.info.setdefault('profile_writes', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, profile_shared):
+            written.add(None)
+            continue
+
+        column = profile_sources.get(type(obj))
+        if column is None:
+            continue
+        history = inspect(obj).attrs[column].history
+        written.update(value for value in (getattr(obj, column),) + tuple(history.deleted or ()) if value is not None)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _noteProfileWrites(session, flush_context):
+    _writtenProviders(session)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _dropWrittenProfiles(session):
+    written = session.info.pop('profile_writes', None)
+    if not written:
+        return
+    if None in written:
+        provider_profile_cache.invalidate()
+    else:
+        provider_profile_cache.invalidate({int(provider_id) for provider_id in written})
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forgetProfileWrites(session):
+    session.info.pop('profile_writes', None)
+
+
+def loadProfile(provider_id, schedule_limit):
+    """Assemble the profile document of a provider
+
+    The provider, its services with their category, its certifications with their
+    certification and its upcoming schedules are read in four queries, whatever the
+    number of rows.
+
+    Args:
+        provider_id: an integer of the provider's id
+        schedule_limit: an integer of the most upcoming schedules listed
+
+    Returns:
+        A dict of the profile, None when the provider is not found
+    """
+    provider = Providers.query.get(provider_id)
+    if provider is None:
+        return None
+
+    services = Services.query.join(Services.category).options(contains_eager(Services.category)).filter(
+        Services.provider_id == provider_id).order_by(Services.id)
+    certifications = ProviderCertifications.query.join(ProviderCertifications.certification).options(
+        contains_eager(ProviderCertifications.certification)).filter(
+        ProviderCertifications.provider_id == provider_id).order_by(ProviderCertifications.id)
+
+    # Schedules with a date are upcoming from today on, those without one repeat every week
+    schedules = Schedules.query.filter(
+        Schedules.provider_id == provider_id,
+        or_(Schedules.date >= date.today().isoformat(), Schedules.date.is_(None))).order_by(
+        Schedules.date.is_(None), Schedules.date, Schedules.time_start, Schedules.id).limit(schedule_limit)
+
+    return dict(
+        serializer(Providers.response_fields)(provider),
+        services=list(map(serializer(Services.profile_fields), services)),
+        certifications=list(map(serializer(ProviderCertifications.profile_fields), certifications)),
+        schedules=list(map(serializer(Schedules.response_fields), schedules)),
+    )
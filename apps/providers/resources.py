@@ -5,9 +5,18 @@ from apps.users.model import Users
 from apps import app, db, adminRequired, nonAdminRequired, jwtRequired
 from flask_jwt_extended import jwt_required, get_jwt_claims
 from ..commons import cors_value, cors_status, content_type_json
+from ..listing import ListEngine
+from ..representations import registerRepresentations
+from ..conditional import rowValidators, cacheHeaders, notModified
+from ..changes.model import Tombstones
+from ..autocomplete.index import autocomplete
+from ..services.facets import adjustFacets, providerFacets, invalidateFacets
+from .profile import provider_profile_cache, loadProfile
 
 bp_providers = Blueprint('providers', __name__)
 api = Api(bp_providers)
+registerRepresentations(api)
+providers_list = ListEngine(Providers)
 
 
 class ProvidersResource(Resource):
@@ -89,6 +98,7 @@ class ProvidersResource(Resource):
         # Save in DB
         db.session.add(provider)
         db.session.commit()
+        autocomplete.upsert('provider', provider.id, provider.name)
 
         app.logger.debug('DEBUG : %s', provider)
 
@@ -113,10 +123,20 @@ class ProvidersResource(Resource):
                 "permit_number": "123-456-789",
             }
 
+        The response carries the ETag and Last-Modified of the row, a request whose
+        If-None-Match or If-Modified-Since still matches gets 304 Not Modified.
         """
         provider = Providers.query.get(id)
 
-        return marshal(provider, Providers.response_fields), 200, {'Content_Type': 'application/json'}
+        if provider is None:
+            return marshal(provider, Providers.response_fields), 200, content_type_json
+
+        etag, last_modified = rowValidators(provider)
+        not_modified = notModified(etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        return marshal(provider, Providers.response_fields), 200, cacheHeaders(content_type_json, etag, last_modified)
 
     # @adminRequired
     def put(self, id):
@@ -179,7 +199,11 @@ class ProvidersResource(Resource):
         if args['details'] is not None:
             provider.details = args['details']
 
-        if args['role'] is not None:
+        if args['role'] is not None and args['role'] != provider.role:
+            # The services of the provider move to the facets of its new role
+            deltas = providerFacets(provider.id, provider.role, -1)
+            deltas.update(providerFacets(provider.id, args['role'], 1))
+            adjustFacets(deltas)
             provider.role = args['role']
 
         if args['permit_number'] is not None:
@@ -187,12 +211,14 @@ class ProvidersResource(Resource):
 
 
         db.session.commit()
+        autocomplete.upsert('provider', provider.id, provider.name)
+        invalidateFacets()
 
         return marshal(provider, Providers.response_fields), 200, {'Content_Type': 'application/json'}
 
     # @adminRequired
     def delete(self, id):
-        """Hard delete a single record from categories table 
+        """Hard delete a single record from categories table, leaving a tombstone for the changes endpoint
         Args (located in function's parameter): 
             id: An integer of provider's id which want to be deleted
         Returns:
@@ -206,8 +232,12 @@ class ProvidersResource(Resource):
         if provider is None:
             return {'status': 'Not Found'}, 404, {'Content_Type': 'application/json'}
 
+        adjustFacets(providerFacets(provider.id, provider.role, -1))
         db.session.delete(provider)
+        db.session.add(Tombstones({'table_name': Providers.__tablename__, 'row_id': provider.id}))
         db.session.commit()
+        autocomplete.remove('provider', id)
+        invalidateFacets()
         return {"Status": "The data with id {} is deleted".format(id)}, 200, {'Content_Type': 'application/json'}
 
 
@@ -224,6 +254,11 @@ class ProvidersList(Resource):
     def get(self):
         """Get all category's data from categories table
 
+            Pages are read with the opaque cursor of the Link header (rel="next"/"prev"),
+            which seeks past the last row instead of counting OFFSET rows. p still works
+            for clients that do not follow the links. The accepted filters, orderby values
+            and largest rp are declared in Providers.list_options.
+
             Returns : An array of dictionary contains all data from users. Example :
             [
                 {   
@@ -240,30 +275,93 @@ class ProvidersList(Resource):
 
             Raise:
               Forbidden(403): An error occured when standard user try to access this method.  
+              Bad Request(400): An error occured when the filters and orderby are not served by one index, or the cursor is invalid
         """
-        parser = reqparse.RequestParser()
-        parser.add_argument('p', type=int, location='args', default=1)
-        parser.add_argument('rp', type=int, location='args', default=25)
-        parser.add_argument('orderby', location='args', choices=('id'))
-        parser.add_argument('sort', location='args', choices=('asc', 'desc'))
-        args = parser.parse_args()
+        return providers_list.get()
+
+
+class ProvidersProfile(Resource):
+    """Class for storing HTTP request method for the profile of a provider, accessed by everyone"""
+
+    def __init__(self):
+        pass
+
+    def options(self, id=None):
+        """Flask-CORS function to make Flask allowing our apps to support cross origin resource sharing (CORS)"""
+        return cors_value, cors_status
+
+    def get(self, id):
+        """Get a provider with its services, certifications and upcoming schedules
 
-        offset = (args['p'] * args['rp']) - args['rp']
+        The profile is read in four queries whatever its size, and kept until a row of
+        the provider, its services, its certifications or its schedules is written (or
+        a category or certification they show). Upcoming schedules are those dated
+        from today on, up to PROVIDER_PROFILE_SCHEDULE_LIMIT, followed by the undated ones.
 
-        qry = Providers.query
+        Returns:
+            A dict of the provider's data with its services, certifications and schedules. For example:
 
-        if args['orderby'] is not None:
-            if args['orderby'] == 'id':
-                if args['sort'] == 'desc':
-                    qry = qry.order_by(desc(Providers.id)) 
-                else:
-                    qry = qry.order_by((Providers.id))
+            {
+                "id": 1,
+                "user_id": 3,
+                "name": "Ratna Sarumpaet",
+                "birthday": "23041993",
+                "experience": "1 Year",
+                "almamater": "Universitas Brawijaya",
+                "details": "-",
+                "role": "midwife",
+                "permit_number": "123-456-789",
+                "services": [
+                    {
+                        "id": 1,
+                        "category_id": 1,
+                        "price": 50000,
+                        "transport_price": 20000,
+                        "category": {"id": 1, "name": "Pijat Bayi", "details": "Pijat Bayi untuk Umur 2 Tahun"}
+                    }
+                ],
+                "certifications": [
+                    {
+                        "id": 1,
+                        "certification_id": 2,
+                        "certification_number": "STR-123",
+                        "date_issued": "2019-01-01",
+                        "date_expired": "2024-01-01",
+                        "details": "-",
+                        "certification": {"id": 2, "name": "Surat Tanda Registrasi", "issuer": "KTKI"}
+                    }
+                ],
+                "schedules": [
+                    {
+                        "id": 4,
+                        "provider_id": 1,
+                        "day": "Monday",
+                        "date": "2026-10-19",
+                        "time_start": "09:00",
+                        "time_end": "12:00",
+                        "status": 1,
+                        "info": "-"
+                    }
+                ]
+            }
+
+        Raise:
+            Not Found(404): An error occured when the id inputted is not found in the table
+        """
+        try:
+            provider_id = int(id)
+        except ValueError:
+            return {'status': 'Not Found'}, 404, content_type_json
 
-        rows = []
-        for row in qry.limit(args['rp']).offset(offset).all():
-            rows.append(marshal(row, Providers.response_fields))
+        profile, ticket = provider_profile_cache.get(provider_id)
+        if profile is None:
+            profile = loadProfile(provider_id, app.config['PROVIDER_PROFILE_SCHEDULE_LIMIT'])
+            if profile is None:
+                return {'status': 'Not Found'}, 404, content_type_json
+            provider_profile_cache.set(ticket, profile)
 
-        return rows, 200, {'Content-Type': 'application/json'}
+        return profile, 200, content_type_json
 
 api.add_resource(ProvidersResource, '', '/<id>')
 api.add_resource(ProvidersList, '/list')
+api.add_resource(ProvidersProfile, '/<id>/profile')
@@ -0,0 +1,68 @@
+from flask import Request, request, make_response
+from werkzeug.exceptions import BadRequest
+from .streaming import StreamedList, outputJson
+import msgpack
+
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# The formats registerRepresentations answers with, the first one is the default
+representation_mimetypes = ('application/json', MSGPACK_MIMETYPE)
+
+
+class MsgpackRequest(Request):
+    """Request class reading MessagePack bodies wherever a JSON body is read
+
+    A body sent with Content-Type application/msgpack is decoded by get_json(), so
+    request.json and reqparse's location='json' see the same dict a JSON body would give.
+    """
+
+    def get_json(self, force=False, silent=False, cache=True):
+        if self.mimetype != MSGPACK_MIMETYPE:
+            return super().get_json(force=force, silent=silent, cache=cache)
+
+        if cache and getattr(self, '_cached_msgpack', None) is not None:
+            return self._cached_msgpack
+
+        try:
+            data = msgpack.unpackb(self.get_data(cache=cache), raw=False)
+        except (ValueError, msgpack.UnpackException):
+            if silent:
+                return None
+            raise BadRequest('Failed to decode MessagePack object')
+
+        if cache:
+            self._cached_msgpack = data
+        return data
+
+
+def outputMsgpack(data, code, headers=None):
+    """Flask-RESTful representation of application/msgpack, with the same schema as the JSON output
+
+    MessagePack writes the length of an array before its items, so a StreamedList is
+    read whole before it is packed.
+    """
+    if isinstance(data, StreamedList):
+        data = data.document()
+
+    response = make_response(msgpack.packb(data, use_bin_type=True), code)
+    response.headers.extend(headers or {})
+    return response
+
+
+def negotiatedMimetype():
+    """Get the mimetype the current request is answered with, chosen from its Accept header like Flask-RESTful does
+
+    On equal quality values the server's order of representation_mimetypes wins, as in
+    Flask-RESTful's best_match, so the ETag always describes the body that is sent.
+    """
+    return request.accept_mimetypes.best_match(representation_mimetypes, default=representation_mimetypes[0])
+
+
+def registerRepresentations(api):
+    """Register the formats every blueprint Api answers with, chosen by the Accept header
+
+    JSON stays the default when the client does not ask for MessagePack.
+    """
+    api.representation('application/json')(outputJson)
+    api.representation(MSGPACK_MIMETYPE)(outputMsgpack)
+    return api
@@ -0,0 +1,84 @@
+from flask import request
+from apps import app
+from apps.caching import LRUCache, registerCache
+from apps.representations import representation_mimetypes, negotiatedMimetype
+import threading
+
+
+class ResponseCache():
+    """Class for caching the GET responses of almost-static tables until they are written
+
+    Entries are keyed by table, response format, route and the sorted query arguments.
+    A list response depends on every row of its table, so list keys also carry the
+    table's generation: a write bumps it, and the old list entries can no longer be
+    found and age out of the LRU. A single-row response is keyed by its id and dropped
+    by a write to that row. A response read while its table was being written is not cached. Each server
+    worker keeps its own cache, so entries also expire after the TTL for the writes
+    another worker served.
+
+    Attributes:
+        invalidations: an integer of invalidate() calls
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.invalidations = 0
+        self._cache = LRUCache(maxsize, ttl)
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _rowId(id):
+        try:
+            return int(id)
+        except (TypeError, ValueError):
+            return str(id)
+
+    def _key(self, table, id, generation, mimetype=None):
+        # The ETag of a response depends on the format it is sent as, so each format has its own entry
+        mimetype = mimetype or negotiatedMimetype()
+        if id is not None:
+            return (table, 'row', self._rowId(id), mimetype)
+        return (table, generation, mimetype, request.path, tuple(sorted(request.args.items(multi=True))))
+
+    def get(self, table, id=None):
+        """Look up the cached entry of the current request
+
+        Args:
+            table: a string of the table name the response is read from
+            id: the row id of a single-row response, None for a list response
+
+        Returns:
+            A (entry, ticket) tuple, entry is None on a miss. The ticket is passed to
+            set() so a response read while the table was written is not cached.
+        """
+        with self._lock:
+            generation = self._generations.get(table, 0)
+        key = self._key(table, id, generation)
+        return self._cache.get(key), (table, generation, key)
+
+    def set(self, ticket, entry):
+        """Cache an entry under the ticket get() returned, unless the table was written since"""
+        table, generation, key = ticket
+        with self._lock:
+            if self._generations.get(table, 0) == generation:
+                self._cache.set(key, entry)
+
+    def invalidate(self, table, id=None):
+        """Drop the cached responses a write to table can change
+
+        Every list of the table is dropped, and the single-row response of id if given.
+        """
+        with self._lock:
+            generation = self._generations.get(table, 0)
+            self._generations[table] = generation + 1
+            self.invalidations += 1
+            if id is not None:
+                for mimetype in representation_mimetypes:
+                    self._cache.delete(self._key(table, id, generation, mimetype))
+
+    def stats(self):
+        """Get the cache counters as a dict"""
+        return dict(self._cache.stats(), invalidations=self.invalidations)
+
+
+response_cache = registerCache('response_cache', ResponseCache(app.config['RESPONSE_CACHE_SIZE'], app.config['RESPONSE_CACHE_TTL']))
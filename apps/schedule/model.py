@@ -20,6 +20,9 @@ class Schedules(db.Model):
         response_field: a dictionary that will be used to be a guide when extracting data from database's field
     """
     __tablename__ = "schedules"
+    __table_args__ = (
+        db.Index('ix_schedules_provider_id_date', 'provider_id', 'date'),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     provider_id = db.Column(db.Integer, db.ForeignKey('providers.id'), nullable = False)
     day = db.Column(db.String(30), nullable=True)
@@ -0,0 +1,211 @@
+from collections import Counter
+from datetime import timedelta
+from operator import itemgetter
+from sqlalchemy import Float, literal
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ColumnElement
+from apps import app, db
+from apps.changes.model import Tombstones
+import heapq
+import math
+import re
+import threading
+import time
+
+_word = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """Split a text into lowercase words of at least two characters"""
+    return [word for word in _word.findall((text or '').lower()) if len(word) > 1]
+
+
+class Match(ColumnElement):
+    """SQL expression of MATCH (columns) AGAINST (text IN NATURAL LANGUAGE MODE), the relevance of a row
+
+    Attributes:
+        columns: a list of the columns of one FULLTEXT index, in its order
+        against: a string of the searched text
+    """
+    type = Float()
+
+    def __init__(self, columns, against):
+        self.columns = columns
+        self.against = literal(against)
+
+
+@compiles(Match)
+def _compileMatch(element, compiler, **kw):
+    return 'MATCH ({}) AGAINST ({} IN NATURAL LANGUAGE MODE)'.format(
+        ', '.join(compiler.process(column, **kw) for column in element.columns),
+        compiler.process(element.against, **kw))
+
+
+class FulltextSearch():
+    """Search backend ranking rows with the MySQL FULLTEXT index of each table
+
+    Attributes:
+        indexes: a dict mapping a model to the columns of its FULLTEXT index
+    """
+
+    def __init__(self, indexes):
+        self.indexes = indexes
+
+    def search(self, model, text, limit):
+        """Get the [(id, score)] of the rows of model matching text, best first"""
+        score = Match(self.indexes[model], text)
+        rows = db.session.query(model.id, score).filter(score > 0).order_by(score.desc()).limit(limit).all()
+        return [(row_id, float(value)) for row_id, value in rows]
+
+
+class InvertedIndex():
+    """Class for an in-memory inverted index ranking documents with BM25
+
+    The BM25 weight of each word in each document is computed when the document is
+    added, against a reference average document length. The weights are computed
+    again only when the average drifted more than a tenth away from the reference,
+    so a search just sums the weights of its words.
+
+    Attributes:
+        postings: a dict mapping a word to a dict of {document id: word count}
+        lengths: a dict mapping a document id to its number of words
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self.postings = {}
+        self.lengths = {}
+        self._weights = {}
+        self._reference = None
+        self._total = 0
+        self._terms = {}
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def _weight(self, count, length):
+        return count * (self.k1 + 1) / (count + self.k1 * (1 - self.b + self.b * length / self._reference))
+
+    def _reweigh(self):
+        self._reference = self._total / len(self.lengths) or 1
+        self._weights = {word: {doc_id: self._weight(count, self.lengths[doc_id]) for doc_id, count in posting.items()}
+                         for word, posting in self.postings.items()}
+
+    def add(self, doc_id, text):
+        """Index a document, replacing the previous text of the same id"""
+        self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        length = sum(terms.values())
+        if self._reference is None:
+            self._reference = length or 1
+
+        for word, count in terms.items():
+            self.postings.setdefault(word, {})[doc_id] = count
+            self._weights.setdefault(word, {})[doc_id] = self._weight(count, length)
+        self._terms[doc_id] = tuple(terms)
+        self.lengths[doc_id] = length
+        self._total += length
+
+    def remove(self, doc_id):
+        """Drop a document from the index, if it is there"""
+        for word in self._terms.pop(doc_id, ()):
+            posting = self.postings[word]
+            del posting[doc_id]
+            del self._weights[word][doc_id]
+            if not posting:
+                del self.postings[word]
+                del self._weights[word]
+        self._total -= self.lengths.pop(doc_id, 0)
+
+    def search(self, text, limit):
+        """Get the [(id, score)] of the documents holding any word of text, best first"""
+        if not self.lengths:
+            return []
+
+        average = self._total / len(self.lengths) or 1
+        if abs(average - self._reference) > self._reference / 10:
+            self._reweigh()
+
+        scores = None
+        for word in set(tokenize(text)):
+            weights = self._weights.get(word)
+            if not weights:
+                continue
+            idf = math.log(1 + (len(self.lengths) - len(weights) + 0.5) / (len(weights) + 0.5))
+            if scores is None:
+                scores = {doc_id: idf * weight for doc_id, weight in weights.items()}
+                continue
+            for doc_id, weight in weights.items():
+                scores[doc_id] = scores.get(doc_id, 0) + idf * weight
+
+        if scores is None:
+            return []
+        return heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+
+
+class MemorySearch():
+    """Search backend keeping an InvertedIndex of each table in the server worker
+
+    It serves databases without a full-text index, such as SQLite in tests. Each index
+    is filled on the first search, then caught up at most every refresh seconds from
+    the rows whose updated_at moved and from the tombstones of the deleted rows, so the
+    writes served by other workers are found too. Rows written in the settle seconds
+    before the last catch up are read again, in case their transaction committed late.
+
+    Attributes:
+        indexes: a dict mapping a model to the columns of its text
+        refresh: a float of seconds between two catch ups
+        settle: a float of seconds rows are read again after
+    """
+
+    def __init__(self, indexes, refresh=1, settle=2):
+        self.indexes = indexes
+        self.refresh = refresh
+        self.settle = timedelta(seconds=settle)
+        self._inverted = {model: InvertedIndex() for model in indexes}
+        self._seen = {model: None for model in indexes}
+        self._tombstone_id = None
+        self._checked = None
+        self._lock = threading.Lock()
+
+    def _text(self, row, columns):
+        return ' '.join(getattr(row, column.key) or '' for column in columns)
+
+    def _catchUp(self):
+        if self._tombstone_id is None:
+            self._tombstone_id = db.session.query(db.func.max(Tombstones.id)).scalar() or 0
+
+        for model, columns in self.indexes.items():
+            qry = db.session.query(model.id, model.updated_at, *columns)
+            if self._seen[model] is not None:
+                qry = qry.filter(model.updated_at >= self._seen[model] - self.settle)
+            for row in qry.yield_per(1000):
+                self._inverted[model].add(row.id, self._text(row, columns))
+                if row.updated_at is not None and (self._seen[model] is None or row.updated_at > self._seen[model]):
+                    self._seen[model] = row.updated_at
+
+        tables = {model.__tablename__: model for model in self.indexes}
+        tombstones = Tombstones.query.filter(Tombstones.id > self._tombstone_id, Tombstones.table_name.in_(tables))
+        for tombstone in tombstones.order_by(Tombstones.id):
+            self._inverted[tables[tombstone.table_name]].remove(tombstone.row_id)
+            self._tombstone_id = tombstone.id
+
+    def search(self, model, text, limit):
+        """Get the [(id, score)] of the rows of model matching text, best first"""
+        with self._lock:
+            if self._checked is None or time.monotonic() - self._checked >= self.refresh:
+                self._catchUp()
+                self._checked = time.monotonic()
+            return self._inverted[model].search(text, limit)
+
+
+def createBackend(indexes):
+    """Create the search backend of the configured SEARCH_BACKEND, 'auto' picks FULLTEXT on MySQL"""
+    backend = app.config['SEARCH_BACKEND']
+    if backend == 'auto':
+        backend = 'fulltext' if db.engine.dialect.name == 'mysql' else 'memory'
+    if backend == 'fulltext':
+        return FulltextSearch(indexes)
+    return MemorySearch(indexes, app.config['SEARCH_REFRESH_SECONDS'], app.config['CHANGES_SETTLE_SECONDS'])
@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from flask import Blueprint
+from flask_restful import Resource, Api, reqparse
+from apps import db
+from ..commons import cors_value, cors_status, content_type_json
+from ..representations import registerRepresentations
+from ..serializers import serializer
+from .backends import createBackend
+import threading
+
+from apps.categories.model import Categories
+from apps.providers.model import Providers
+from apps.services.model import Services
+
+bp_search = Blueprint('search', __name__)
+api = Api(bp_search)
+registerRepresentations(api)
+
+# The searched columns of each table, in the order of its FULLTEXT index
+search_indexes = OrderedDict([
+    (Providers, [Providers.name, Providers.role, Providers.almamater, Providers.details]),
+    (Categories, [Categories.name, Categories.details]),
+])
+
+# Share of a matched category's score given to the providers offering it
+category_weight = 0.5
+
+# Most (provider, category) pairs of services read for the matched categories
+max_category_pairs = 1000
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def searchBackend():
+    """Get the search backend of this server worker, creating it on first use"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = createBackend(search_indexes)
+        return _backend
+
+
+def _limitType(value):
+    value = int(value)
+    if value < 1 or value > 50:
+        raise ValueError('limit must be between 1 and 50')
+    return value
+
+
+def searchCatalog(text, limit):
+    """Rank the providers and categories matching text
+
+    A provider's score is the relevance of its own name, role, almamater and details,
+    plus category_weight times the best score of the matched categories it offers a
+    service in. The providers offering the matched categories are found through the
+    services.category_id index, so a search costs the same few queries at any table size.
+
+    Returns:
+        A (providers, categories) tuple of lists of (row, score, category ids), best first
+    """
+    backend = searchBackend()
+    categories = backend.search(Categories, text, limit)
+    scores = dict(backend.search(Providers, text, limit))
+
+    category_scores = dict(categories)
+    offered = {}
+    if category_scores:
+        pairs = db.session.query(Services.provider_id, Services.category_id).filter(
+            Services.category_id.in_(category_scores)).distinct().limit(max_category_pairs)
+        for provider_id, category_id in pairs:
+            offered.setdefault(provider_id, []).append(category_id)
+        for provider_id, category_ids in offered.items():
+            best = max(category_scores[category_id] for category_id in category_ids)
+            scores[provider_id] = scores.get(provider_id, 0) + category_weight * best
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    providers = {row.id: row for row in Providers.query.filter(Providers.id.in_([row_id for row_id, _ in ranked]))} if ranked else {}
+    category_rows = {row.id: row for row in Categories.query.filter(Categories.id.in_(category_scores))} if category_scores else {}
+
+    # A row deleted since the index was caught up is left out
+    return (
+        [(providers[row_id], score, sorted(offered.get(row_id, []))) for row_id, score in ranked if row_id in providers],
+        [(category_rows[row_id], score, []) for row_id, score in categories if row_id in category_rows],
+    )
+
+
+class SearchResource(Resource):
+    """Class for storing HTTP request method for the full-text search of the catalog, accessed by everyone"""
+
+    def __init__(self):
+        pass
+
+    def options(self):
+        """Flask-CORS function to make Flask allowing our apps to support cross origin resource sharing (CORS)"""
+        return cors_value, cors_status
+
+    def get(self):
+        """Search providers and categories by text
+
+        Providers are matched on their name, role, almamater and details, and on the
+        name and details of the categories they offer services in. Production ranks
+        them with the MySQL FULLTEXT indexes; other databases use an inverted index
+        kept by each server worker (see SEARCH_BACKEND).
+
+        Args (located in query string):
+            q: a string of the searched words
+            limit: an integer of the most providers and categories returned, 20 by default
+
+        Returns:
+            A dict of the ranked providers and categories, best first. category_ids are
+            the matched categories the provider offers. For example:
+
+            {
+                "providers": [
+                    {
+                        "id": 3,
+                        "user_id": 7,
+                        "name": "Bidan Sari",
+                        "birthday": "1990-01-01",
+                        "experience": "5",
+                        "almamater": "Poltekkes Semarang",
+                        "details": "Pijat bayi",
+                        "role": "midwife",
+                        "permit_number": "123/IBI/2019",
+                        "score": 2.41,
+                        "category_ids": [1]
+                    }
+                ],
+                "categories": [
+                    {"id": 1, "name": "Pijat Bayi", "details": "Pijat Bayi untuk Umur 2 Tahun", "score": 1.37}
+                ]
+            }
+
+        Raise:
+            Bad Request(400): An error occured when q is missing or limit is out of range
+        """
+        parser = reqparse.RequestParser()
+        parser.add_argument('q', location='args', required=True)
+        parser.add_argument('limit', type=_limitType, location='args', default=20)
+        args = parser.parse_args()
+
+        providers, categories = searchCatalog(args['q'], args['limit'])
+
+        provider_fields = serializer(Providers.response_fields)
+        category_fields = serializer(Categories.response_fields)
+        return {
+            'providers': [dict(provider_fields(row), score=round(score, 4), category_ids=category_ids)
+                          for row, score, category_ids in providers],
+            'categories': [dict(category_fields(row), score=round(score, 4)) for row, score, _ in categories],
+        }, 200, content_type_json
+
+
+api.add_resource(SearchResource, '')
@@ -0,0 +1,157 @@
+from bisect import bisect_right
+from collections import Counter
+from flask_script import Command
+from sqlalchemy.dialects import mysql
+from apps import app, db, manager
+from apps.caching import LRUCache, registerCache
+from apps.categories.model import Categories
+from apps.providers.model import Providers
+from .model import Services, ServiceFacets
+
+# Lower bounds of the price ranges, the last range has no upper bound
+price_buckets = tuple(sorted(app.config['SERVICE_PRICE_BUCKETS']))
+
+# The facet count rows and category names, each server worker keeps its own so they also expire after a TTL
+facet_cache = registerCache('facet_cache', LRUCache(1, app.config['SERVICE_FACETS_TTL']))
+
+
+def priceBucket(price):
+    """Get the index of the price range of a price, -1 when there is no price"""
+    if price is None:
+        return -1
+    return bisect_right(price_buckets, int(price)) - 1
+
+
+def bucketRange(bucket):
+    """Get the (lowest, highest) prices of a price range, highest is None for the last range"""
+    highest = price_buckets[bucket + 1] if bucket + 1 < len(price_buckets) else None
+    return price_buckets[bucket], highest
+
+
+def bucketLabel(bucket):
+    """Get the price range a client filters by, such as "50000-100000" or "500000-" """
+    lowest, highest = bucketRange(bucket)
+    return '{}-{}'.format(lowest, highest if highest is not None else '')
+
+
+# The price ranges a client filters by, in the order of price_buckets
+price_labels = tuple(bucketLabel(bucket) for bucket in range(len(price_buckets)))
+
+
+def facetKey(category_id, role, price):
+    """Get the (category_id, role, price_bucket) a service is counted in"""
+    return (int(category_id), role, priceBucket(price))
+
+
+def adjustFacets(deltas):
+    """Add to the facet counts in the current transaction, the caller commits
+
+    On MySQL each count is changed by one INSERT ... ON DUPLICATE KEY UPDATE, so two
+    writes of the same facet can not lose one another. Call invalidateFacets() after
+    the commit.
+
+    Args:
+        deltas: a dict mapping a facetKey() to the number of services added, negative when removed
+    """
+    for (category_id, role, bucket), delta in deltas.items():
+        if not delta:
+            continue
+
+        if db.engine.dialect.name == 'mysql':
+            insert = mysql.insert(ServiceFacets.__table__).values(
+                category_id=category_id, role=role, price_bucket=bucket, count=delta)
+            db.session.execute(insert.on_duplicate_key_update(count=ServiceFacets.__table__.c.count + delta))
+            continue
+
+        updated = ServiceFacets.query.filter_by(category_id=category_id, role=role, price_bucket=bucket).update(
+            {ServiceFacets.count: ServiceFacets.count + delta}, synchronize_session=False)
+        if not updated:
+            db.session.add(ServiceFacets({'category_id': category_id, 'role': role, 'price_bucket': bucket, 'count': delta}))
+
+
+def providerFacets(provider_id, role, sign):
+    """Get the deltas of counting every service of a provider under role, sign is 1 to add them and -1 to remove them"""
+    deltas = Counter()
+    for category_id, price in db.session.query(Services.category_id, Services.price).filter(Services.provider_id == provider_id):
+        deltas[facetKey(category_id, role, price)] += sign
+    return deltas
+
+
+def invalidateFacets():
+    """Drop the cached facet counts after a write"""
+    facet_cache.clear()
+
+
+def rebuildFacets():
+    """Count every facet again from the services and providers tables, such as after the migration adding service_facets"""
+    ServiceFacets.query.delete(synchronize_session=False)
+    deltas = Counter()
+    rows = db.session.query(Services.category_id, Providers.role, Services.price).join(
+        Providers, Providers.id == Services.provider_id)
+    for category_id, role, price in rows.yield_per(1000):
+        deltas[facetKey(category_id, role, price)] += 1
+    adjustFacets(deltas)
+    db.session.commit()
+    invalidateFacets()
+
+
+class RebuildFacets(Command):
+    """Manager command counting the service facets again, run as `python run.py rebuild_facets`"""
+
+    def run(self):
+        rebuildFacets()
+
+
+manager.add_command('rebuild_facets', RebuildFacets())
+
+
+def _facetRows():
+    cached = facet_cache.get('facets')
+    if cached is None:
+        rows = db.session.query(ServiceFacets.category_id, ServiceFacets.role, ServiceFacets.price_bucket,
+                                ServiceFacets.count).filter(ServiceFacets.count > 0).all()
+        names = dict(db.session.query(Categories.id, Categories.name).filter(
+            Categories.id.in_({row[0] for row in rows})).all()) if rows else {}
+        cached = (rows, names)
+        facet_cache.set('facets', cached)
+    return cached
+
+
+def facetCounts(category_id=None, role=None, bucket=None):
+    """Count the services of each facet value under the other facets' filters
+
+    The counts of a facet ignore its own filter, so a client filtering by one category
+    still sees how many services the other categories have.
+
+    Args:
+        category_id: an integer of the filtered category id, or None
+        role: a string of the filtered provider role, or None
+        bucket: an integer of the filtered price range, or None
+
+    Returns:
+        A (total, facets) tuple, total is the number of services matching every filter
+        and facets is a dict of the lists of category, role and price counts.
+    """
+    rows, names = _facetRows()
+    total = 0
+    categories, roles, prices = Counter(), Counter(), Counter()
+    for row_category_id, row_role, row_bucket, count in rows:
+        in_category = category_id is None or row_category_id == category_id
+        in_role = role is None or row_role == role
+        in_price = bucket is None or row_bucket == bucket
+        if in_role and in_price:
+            categories[row_category_id] += count
+        if in_category and in_price:
+            roles[row_role] += count
+        if in_category and in_role:
+            if row_bucket >= 0:
+                prices[row_bucket] += count
+            if in_price:
+                total += count
+
+    return total, {
+        'category': [{'id': key, 'name': names.get(key), 'count': count}
+                     for key, count in categories.most_common() if key in names],
+        'role': [{'value': key, 'count': count} for key, count in roles.most_common()],
+        'price': [{'value': bucketLabel(key), 'count': prices[key]} for key in sorted(prices)],
+    }
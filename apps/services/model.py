@@ -14,17 +14,30 @@ class Services(db.Model):
         transport_price: an integer that shows the transport price of a service.
         created_at: a datetime that indicates when the row created
         updated_at: a datetime that indicates when the row last updated
+        provider: the Providers row of provider_id, loaded only when a query asks for it
+        category: the Categories row of category_id, loaded only when a query asks for it
         response_field: a dictionary that will be used to be a guide when extracting data from database's field
+        list_options: a dictionary of the filters, sort keys and page size the list endpoint accepts
+        browse_fields: a dictionary like response_field, with the provider and category fields a service card shows
+        browse_options: a dictionary like list_options, for the browse endpoint
+        profile_fields: a dictionary like response_field, with the category fields a provider profile shows
     """
     __tablename__ = "services"
+    __table_args__ = (
+        db.Index('ix_services_category_id_price', 'category_id', 'price'),
+        db.Index('ix_services_category_id_transport_price', 'category_id', 'transport_price'),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    provider_id = db.Column(db.Integer, db.ForeignKey('providers.id'), nullable = False)
-    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable = False)
-    price = db.Column(db.Integer, nullable=True)
-    transport_price = db.Column(db.Integer, nullable=True)
+    provider_id = db.Column(db.Integer, db.ForeignKey('providers.id'), nullable = False, index=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable = False, index=True)
+    price = db.Column(db.Integer, nullable=True, index=True)
+    transport_price = db.Column(db.Integer, nullable=True, index=True)
     created_at = db.Column(db.DateTime,  default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime,  default=db.func.current_timestamp(
-    ), onupdate=db.func.current_timestamp())
+    ), onupdate=db.func.current_timestamp(), index=True)
+
+    provider = db.relationship('Providers', lazy='raise')
+    category = db.relationship('Categories', lazy='raise')
 
     response_fields = {
         'id': fields.Integer,
@@ -34,6 +47,48 @@ class Services(db.Model):
         'transport_price': fields.Integer,
     }
 
+    list_options = {
+        'filters': ('provider_id', 'category_id'),
+        'sort_keys': ('id', 'price'),
+        'max_rp': 100,
+    }
+
+    browse_fields = {
+        'id': fields.Integer,
+        'provider_id': fields.Integer,
+        'category_id': fields.Integer,
+        'price': fields.Integer,
+        'transport_price': fields.Integer,
+        'provider': fields.Nested({
+            'id': fields.Integer,
+            'name': fields.String,
+            'role': fields.String,
+            'experience': fields.String,
+        }),
+        'category': fields.Nested({
+            'id': fields.Integer,
+            'name': fields.String,
+        }),
+    }
+
+    profile_fields = {
+        'id': fields.Integer,
+        'category_id': fields.Integer,
+        'price': fields.Integer,
+        'transport_price': fields.Integer,
+        'category': fields.Nested({
+            'id': fields.Integer,
+            'name': fields.String,
+            'details': fields.String,
+        }),
+    }
+
+    browse_options = {
+        'filters': ('category_id',),
+        'sort_keys': ('id', 'price', 'transport_price'),
+        'max_rp': 100,
+    }
+
     def __init__(self, data):
         """Inits Providers with data that user inputted
 
@@ -49,3 +104,42 @@ class Services(db.Model):
         self.category_id = data['category_id']
         self.price = data['price']
         self.transport_price = data['transport_price']
+
+
+class ServiceFacets(db.Model):
+    """Class for storing information about service_facets table, the number of services of each facet combination
+
+    The faceted search sums these rows instead of counting services. They are kept up
+    to date by the services and providers write paths, in the same transaction.
+
+    Attributes:
+        __tablename__: a string of table name
+        id: an integer of the row's id
+        category_id: an integer of the services' category id
+        role: a string of the role of the services' providers
+        price_bucket: an integer of the index of the price range the services' price is in, -1 for services without price
+        count: an integer of the services with these category, role and price range
+    """
+    __tablename__ = "service_facets"
+    __table_args__ = (
+        db.UniqueConstraint('category_id', 'role', 'price_bucket', name='uq_service_facets_key'),
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    category_id = db.Column(db.Integer, nullable=False)
+    role = db.Column(db.String(30), nullable=False)
+    price_bucket = db.Column(db.Integer, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __init__(self, data):
+        """Inits ServiceFacets with a facet combination and its number of services
+
+        Args:
+                category_id: an integer of the services' category id.
+                role: a string of the role of the services' providers.
+                price_bucket: an integer of the index of the price range.
+                count: an integer of the services.
+        """
+        self.category_id = data['category_id']
+        self.role = data['role']
+        self.price_bucket = data['price_bucket']
+        self.count = data['count']
@@ -1,15 +1,36 @@
 from flask import Blueprint, Response, json
 from flask_restful import Resource, Api, reqparse, marshal, inputs
 from .model import Services
+from .facets import facetKey, adjustFacets, invalidateFacets, facetCounts, bucketRange, price_labels
 from apps import app, db, adminRequired, nonAdminRequired, jwtRequired
 from flask_jwt_extended import jwt_required, get_jwt_claims
+from sqlalchemy.orm import contains_eager
 from ..commons import cors_value, cors_status, content_type_json
+from ..listing import ListEngine
+from ..representations import registerRepresentations
+from ..conditional import rowValidators, cacheHeaders, notModified
+from ..pagination import paginate
+from ..serializers import serializer
+from ..changes.model import Tombstones
 
 from apps.providers.model import Providers
 from apps.categories.model import Categories
 
 bp_services = Blueprint('services', __name__)
 api = Api(bp_services)
+registerRepresentations(api)
+services_list = ListEngine(Services)
+services_browse = ListEngine(
+    Services,
+    list_options=Services.browse_options,
+    response_fields=Services.browse_fields,
+    query=lambda: Services.query.join(Services.provider).join(Services.category).options(
+        contains_eager(Services.provider), contains_eager(Services.category)),
+    joined=(Providers, Categories))
+
+
+def _providerRole(provider_id):
+    return db.session.query(Providers.role).filter(Providers.id == provider_id).scalar()
 
 
 class ServicesResource(Resource):
@@ -69,8 +90,8 @@ class ServicesResource(Resource):
             return {'msg': 'Provider is not found'}, 400, {'Content_Type': 'application/json'}
 
         # Check the category is exist or not
-        provider = Categories.query.get(args['category_id'])
-        if provider is None:
+        category = Categories.query.get(args['category_id'])
+        if category is None:
             return {'msg': 'Category is not found'}, 400, {'Content_Type': 'application/json'}
 
         app.logger.debug(new_service)
@@ -78,7 +99,9 @@ class ServicesResource(Resource):
         # Save in DB
         service = Services(new_service)
         db.session.add(service)
+        adjustFacets({facetKey(service.category_id, provider.role, service.price): 1})
         db.session.commit()
+        invalidateFacets()
 
         app.logger.debug('DEBUG : %s', service)
 
@@ -99,10 +122,20 @@ class ServicesResource(Resource):
                 "transport_price": 20000,
             }
 
+        The response carries the ETag and Last-Modified of the row, a request whose
+        If-None-Match or If-Modified-Since still matches gets 304 Not Modified.
         """
         service = Services.query.get(id)
 
-        return marshal(service, Services.response_fields), 200, {'Content_Type': 'application/json'}
+        if service is None:
+            return marshal(service, Services.response_fields), 200, content_type_json
+
+        etag, last_modified = rowValidators(service)
+        not_modified = notModified(etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        return marshal(service, Services.response_fields), 200, cacheHeaders(content_type_json, etag, last_modified)
 
     # @adminRequired
     def put(self, id):
@@ -141,6 +174,8 @@ class ServicesResource(Resource):
         if service is None:
             return {'status': 'Not Found'}, 404, {'Content_Type': 'application/json'}
 
+        old_key = facetKey(service.category_id, _providerRole(service.provider_id), service.price)
+
         if args['provider_id'] is not None:
             service.provider_id = args['provider_id']
 
@@ -153,13 +188,18 @@ class ServicesResource(Resource):
         if args['transport_price'] is not None:
             service.transport_price = args['transport_price'].title()
 
+        new_key = facetKey(service.category_id, _providerRole(service.provider_id), service.price)
+        if new_key != old_key:
+            adjustFacets({old_key: -1, new_key: 1})
+
         db.session.commit()
+        invalidateFacets()
 
         return marshal(service, Services.response_fields), 200, {'Content_Type': 'application/json'}
 
     # @adminRequired
     def delete(self, id):
-        """Hard delete a single record from services table 
+        """Hard delete a single record from services table, leaving a tombstone for the changes endpoint
         Args (located in function's parameter): 
             id: An integer of provider's id which want to be deleted
         Returns:
@@ -173,8 +213,11 @@ class ServicesResource(Resource):
         if service is None:
             return {'status': 'Not Found'}, 404, {'Content_Type': 'application/json'}
 
+        adjustFacets({facetKey(service.category_id, _providerRole(service.provider_id), service.price): -1})
         db.session.delete(service)
+        db.session.add(Tombstones({'table_name': Services.__tablename__, 'row_id': service.id}))
         db.session.commit()
+        invalidateFacets()
         return {"Status": "The data with id {} is deleted".format(id)}, 200, {'Content_Type': 'application/json'}
 
 
@@ -191,6 +234,11 @@ class ServicesList(Resource):
     def get(self):
         """Get all category's data from services table
 
+            Pages are read with the opaque cursor of the Link header (rel="next"/"prev"),
+            which seeks past the last row instead of counting OFFSET rows. p still works
+            for clients that do not follow the links. The accepted filters, orderby values
+            and largest rp are declared in Services.list_options.
+
             Returns : An array of dictionary contains all data from users. Example :
             [
                 {
@@ -211,30 +259,159 @@ class ServicesList(Resource):
 
             Raise:
               Forbidden(403): An error occured when standard user try to access this method.  
+              Bad Request(400): An error occured when the filters and orderby are not served by one index, or the cursor is invalid
         """
-        parser = reqparse.RequestParser()
-        parser.add_argument('p', type=int, location='args', default=1)
-        parser.add_argument('rp', type=int, location='args', default=25)
-        parser.add_argument('orderby', location='args', choices=('id'))
-        parser.add_argument('sort', location='args', choices=('asc', 'desc'))
-        args = parser.parse_args()
+        return services_list.get()
+
+class ServicesBrowse(Resource):
+    """Class for storing HTTP request method for the service cards, services with their provider and category, accessed by everyone"""
+
+    def __init__(self):
+        pass
+
+    def options(self):
+        """Flask-CORS function to make Flask allowing our apps to support cross origin resource sharing (CORS)"""
+        return cors_value, cors_status
+
+    def get(self):
+        """Get a page of services, each with the provider and category fields its card shows
+
+            The services, providers and categories of a page are read in one joined
+            query, instead of one request per provider and category. Rows are found
+            through the (category_id, price) and (category_id, transport_price) indexes
+            and paged with the cursor of the Link header, like the other lists. The
+            accepted filters, orderby values and largest rp are declared in
+            Services.browse_options.
+
+            Returns : An array of dictionary contains the services. Example :
+            [
+                {
+                    "id": 1,
+                    "provider_id": 1,
+                    "category_id": 1,
+                    "price": 50000,
+                    "transport_price": 20000,
+                    "provider": {
+                        "id": 1,
+                        "name": "Bidan Sari",
+                        "role": "midwife",
+                        "experience": "5"
+                    },
+                    "category": {
+                        "id": 1,
+                        "name": "Pijat Bayi"
+                    }
+                }
+            ]
+
+            Raise:
+              Bad Request(400): An error occured when the filters and orderby are not served by one index, or the cursor is invalid
+        """
+        return services_browse.get()
+
 
-        offset = (args['p'] * args['rp']) - args['rp']
+def _searchPageSize(value):
+    value = int(value)
+    if value < 1 or value > Services.browse_options['max_rp']:
+        raise ValueError('rp must be between 1 and {}'.format(Services.browse_options['max_rp']))
+    return value
 
-        qry = Services.query
 
-        if args['orderby'] is not None:
-            if args['orderby'] == 'id':
-                if args['sort'] == 'desc':
-                    qry = qry.order_by(desc(Services.id)) 
-                else:
-                    qry = qry.order_by((Services.id))
+class ServicesSearch(Resource):
+    """Class for storing HTTP request method for the faceted search of services, accessed by everyone"""
 
-        rows = []
-        for row in qry.limit(args['rp']).offset(offset).all():
-            rows.append(marshal(row, Services.response_fields))
+    def __init__(self):
+        pass
+
+    def options(self):
+        """Flask-CORS function to make Flask allowing our apps to support cross origin resource sharing (CORS)"""
+        return cors_value, cors_status
 
-        return rows, 200, {'Content-Type': 'application/json'}
+    def get(self):
+        """Get a page of services filtered by category, provider role and price range, with the count of each facet value
+
+            The page is one joined query, like the browse endpoint. The facet counts are
+            not counted from the services: they are summed from the service_facets table,
+            which the services and providers write paths keep up to date in the same
+            transaction, and cached for SERVICE_FACETS_TTL seconds. The counts of a facet
+            ignore its own filter, so the other values of the facet can still be offered.
+            Price ranges start at each bound of SERVICE_PRICE_BUCKETS. total counts the
+            same services the pages list: sorted by price, the services without a price
+            come last instead of being left out.
+
+            Args (located in query string):
+                category_id: an integer of the category of the services
+                role: a string of the role of the services' providers, such as midwife
+                price: a string of a price range listed in the price facet, such as 50000-100000
+                orderby: a string, id or price, services without a price are listed last
+                sort: a string, asc or desc
+                rp: an integer of the services per page, 25 by default
+                cursor: a string of the cursor of the Link header
+
+            Returns : A dict of the services of the page, the number of services matching
+            every filter and the facet counts. Example :
+            {
+                "services": [
+                    {
+                        "id": 1,
+                        "provider_id": 1,
+                        "category_id": 1,
+                        "price": 50000,
+                        "transport_price": 20000,
+                        "provider": {"id": 1, "name": "Bidan Sari", "role": "midwife", "experience": "5"},
+                        "category": {"id": 1, "name": "Pijat Bayi"}
+                    }
+                ],
+                "total": 17,
+                "facets": {
+                    "category": [{"id": 1, "name": "Pijat Bayi", "count": 17}, {"id": 2, "name": "Baby Spa", "count": 42}],
+                    "role": [{"value": "midwife", "count": 17}],
+                    "price": [{"value": "50000-100000", "count": 17}]
+                }
+            }
+
+            Raise:
+              Bad Request(400): An error occured when a filter is not valid, or the cursor is invalid
+        """
+        parser = reqparse.RequestParser()
+        parser.add_argument('category_id', type=int, location='args')
+        parser.add_argument('role', location='args')
+        parser.add_argument('price', location='args', choices=price_labels)
+        parser.add_argument('orderby', location='args', choices=('id', 'price'), default='id')
+        parser.add_argument('sort', location='args', choices=('asc', 'desc'), default='asc')
+        parser.add_argument('rp', type=_searchPageSize, location='args', default=25)
+        parser.add_argument('cursor', location='args')
+        args = parser.parse_args()
+
+        qry = Services.query.join(Services.provider).join(Services.category).options(
+            contains_eager(Services.provider), contains_eager(Services.category))
+        if args['category_id'] is not None:
+            qry = qry.filter(Services.category_id == args['category_id'])
+        if args['role'] is not None:
+            qry = qry.filter(Providers.role == args['role'])
+
+        bucket = None
+        if args['price'] is not None:
+            bucket = price_labels.index(args['price'])
+            lowest, highest = bucketRange(bucket)
+            qry = qry.filter(Services.price >= lowest)
+            if highest is not None:
+                qry = qry.filter(Services.price < highest)
+
+        sort_column = Services.price if args['orderby'] == 'price' else Services.id
+        try:
+            page = paginate(qry, sort_column, Services.id, args['sort'] == 'desc', args['rp'], args['cursor'])
+        except ValueError:
+            return {'message': 'Invalid cursor'}, 400, content_type_json
+
+        total, facets = facetCounts(args['category_id'], args['role'], bucket)
+        return {
+            'services': list(map(serializer(Services.browse_fields), page.rows)),
+            'total': total,
+            'facets': facets,
+        }, 200, page.headers(content_type_json)
 
 api.add_resource(ServicesResource, '', '/<id>')
 api.add_resource(ServicesList, '/list')
+api.add_resource(ServicesBrowse, '/browse')
+api.add_resource(ServicesSearch, '/search')
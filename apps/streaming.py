@@ -0,0 +1,111 @@
+from flask import json, Response, make_response, stream_with_context
+from sqlalchemy.orm import Query
+from .serializers import serializer, encodeJson
+
+
+def jsonChunks(items, head='[', tail=']', batch=100, dumps=json.dumps):
+    """Yield a JSON document piece by piece, with items written as the members of an array
+
+    Only one batch of serialized items is held at a time, so the memory used does not
+    depend on how many items there are.
+
+    Args:
+        items: an iterable of JSON serializable objects
+        head: a string written before the first item, it must open the array
+        tail: a string written after the last item, it must close the array. A callable
+            is called once every item was written, so the tail can describe them
+        batch: an integer of items joined into one chunk
+        dumps: a function serializing one item
+    """
+    yield head
+
+    separator = ''
+    buffer = []
+    for item in items:
+        buffer.append(dumps(item))
+        if len(buffer) >= batch:
+            yield separator + ','.join(buffer)
+            separator = ','
+            buffer = []
+
+    if buffer:
+        yield separator + ','.join(buffer)
+
+    yield tail() if callable(tail) else tail
+
+
+class StreamedList():
+    """Class for a resource body written to the client while its rows are still being read
+
+    A resource opts in by returning a StreamedList instead of a list, from a blueprint
+    whose Api has outputJson as its application/json representation. A Query is read
+    through a server-side cursor batch rows at a time, and rows are serialized one by
+    one, so neither the rows nor the serialized body are ever held whole.
+
+    Attributes:
+        items: an iterable of rows, or a Query
+        fields: a dict of response fields each row is serialized with, or None when the
+            rows are already JSON serializable
+        key: a string, when given the body is an object holding the rows under key
+            instead of an array of the rows
+        extra: a callable returning a dict of more members of that object. It is called
+            once every row was read, so they can describe the rows
+        batch: an integer of rows fetched and written at a time
+    """
+
+    def __init__(self, items, fields=None, key=None, extra=None, batch=100):
+        self.items = items
+        self.fields = fields
+        self.key = key
+        self.extra = extra
+        self.batch = batch
+
+    def rows(self):
+        """Iterate the rows, serialized when fields were given"""
+        items = self.items
+        if isinstance(items, Query):
+            items = items.execution_options(stream_results=True).yield_per(self.batch)
+        if self.fields is None:
+            return iter(items)
+        return map(serializer(self.fields), items)
+
+    def _extra(self):
+        return self.extra() if self.extra is not None else {}
+
+    def chunks(self):
+        """Iterate the JSON body"""
+        if self.key is None:
+            return jsonChunks(self.rows(), batch=self.batch, dumps=encodeJson)
+
+        def tail():
+            extra = self._extra()
+            # The members of the extra object, without its braces
+            return '],' + encodeJson(extra)[1:-1] + '}' if extra else ']}'
+
+        return jsonChunks(self.rows(), '{' + encodeJson(self.key) + ':[', tail, self.batch, encodeJson)
+
+    def document(self):
+        """Read the whole body into a list or dict, for the formats that can not be streamed"""
+        rows = list(self.rows())
+        if self.key is None:
+            return rows
+
+        document = {self.key: rows}
+        document.update(self._extra())
+        return document
+
+
+def outputJson(data, code, headers=None):
+    """Flask-RESTful representation of application/json that streams StreamedList bodies
+
+    Register it with api.representation('application/json')(outputJson). Any other body
+    is serialized like Flask-RESTful's output_json does, through encodeJson.
+    """
+    if not isinstance(data, StreamedList):
+        response = make_response(encodeJson(data) + '\n', code)
+        response.headers.extend(headers or {})
+        return response
+
+    response = Response(stream_with_context(data.chunks()), code, mimetype='application/json')
+    response.headers.extend(headers or {})
+    return response
@@ -1,5 +1,6 @@
 from apps import db
-from flask_restful import fields
+from flask_restful import fields, marshal
+from sqlalchemy import desc
 
 
 class UserConditions(db.Model):
@@ -54,3 +55,22 @@ class UserConditions(db.Model):
         self.condition = data['condition']
         self.condition_details = data['condition_details']
         self.user_answer = data['user_answer']
+
+    @classmethod
+    def latestForUser(cls, user_id):
+        """Get the latest answer of a user for each condition, newest first
+
+        Returns:
+            A list of dicts of UserConditions.response_fields
+        """
+        user_conditions = cls.query.filter(cls.user_id == user_id).order_by(desc(cls.id))
+
+        # Loop for getting the latest answer for the latest condition_id
+        rows = []
+        answered = set()
+        for user_condition in user_conditions:
+            if user_condition.condition_id not in answered:
+                answered.add(user_condition.condition_id)
+                rows.append(marshal(user_condition, cls.response_fields))
+
+        return rows
@@ -1,16 +1,17 @@
 from flask import Blueprint, Response, json
 from flask_restful import Resource, Api, reqparse, marshal, inputs
-from sqlalchemy import desc
 from .model import UserConditions
 from apps import app, db, adminRequired, nonAdminRequired, jwtRequired
 from flask_jwt_extended import jwt_required, get_jwt_claims
 from ..commons import cors_value, cors_status, content_type_json
+from ..representations import registerRepresentations
 
 from apps.conditions.model import Conditions
 from apps.users.model import Users
 
 bp_user_conditions = Blueprint('user_conditions', __name__)
 api = Api(bp_user_conditions)
+registerRepresentations(api)
 
 
 class UserConditionsResource(Resource):
@@ -109,14 +110,6 @@ class UserConditionsResource(Resource):
         """
         claims = get_jwt_claims()
 
-        user_conditions = UserConditions.query.filter(UserConditions.user_id==claims['id']).order_by(desc(UserConditions.id))
-
-        # Loop for getting the latest answer for the latest condition_id
-        rows = []
-        for user_condition in user_conditions:
-            if not any(user_condition.condition_id == row['condition_id'] for row in rows):
-                rows.append(marshal(user_condition, UserConditions.response_fields))
-
-        return rows, 200, content_type_json
+        return UserConditions.latestForUser(claims['id']), 200, content_type_json
 
 api.add_resource(UserConditionsResource, '')
@@ -2,12 +2,15 @@ from flask import Blueprint, Response, json
 from flask_restful import Resource, Api, reqparse, marshal, inputs
 from .model import UserInfos
 from apps.users.model import Users
+from apps.users.cache import getUserInfo, invalidateUserInfo
 from apps import app, db, adminRequired, nonAdminRequired, jwtRequired
 from flask_jwt_extended import jwt_required, get_jwt_claims
 from ..commons import cors_value, cors_status, content_type_json
+from ..representations import registerRepresentations
 
 bp_user_infos = Blueprint('user_infos', __name__)
 api = Api(bp_user_infos)
+registerRepresentations(api)
 
 
 class UserInfosResource(Resource):
@@ -74,6 +77,7 @@ class UserInfosResource(Resource):
         # Save in DB
         db.session.add(user_info)
         db.session.commit()
+        invalidateUserInfo(claims['id'])
 
         app.logger.debug('DEBUG : %s', user_info)
 
@@ -97,10 +101,10 @@ class UserInfosResource(Resource):
 
         """
         claims = get_jwt_claims()
-        user_info = UserInfos.query.get(claims['id'])
+        user_info = getUserInfo(claims['id'])
 
         if user_info is not None:
-            return marshal(user_info, UserInfos.response_fields), 200, content_type_json
+            return user_info, 200, content_type_json
 
         return {'status':'NOT_FOUND'}, 400, content_type_json
 
@@ -161,6 +165,7 @@ class UserInfosResource(Resource):
             user_info.height = args['height']
 
         db.session.commit()
+        invalidateUserInfo(claims['id'])
 
         return marshal(user_info, UserInfos.response_fields), 200, {'Content_Type': 'application/json'}
 
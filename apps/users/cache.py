@@ -0,0 +1,67 @@
+from apps import app
+from apps.caching import LRUCache, registerCache
+from flask_restful import marshal
+from .model import Users
+from apps.user_infos.model import UserInfos
+
+# Marshalled users and user infos keyed by ('user', id) and ('user_info', id). A user
+# info that does not exist is cached as False, since most users never fill one in.
+profile_cache = registerCache('profile_cache', LRUCache(app.config['PROFILE_CACHE_SIZE'], app.config['PROFILE_CACHE_TTL']))
+
+
+def _userId(user_id):
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def getProfile(user_id):
+    """Get a user's marshalled data by id, from profile_cache when possible
+
+    Returns:
+        A dict of Users.response_fields, or None when the user does not exist
+    """
+    user_id = _userId(user_id)
+    if user_id is None:
+        return None
+
+    # Missing users are not cached, a new sign up could take the id at any time
+    profile = profile_cache.get(('user', user_id))
+    if profile is None:
+        user = Users.query.get(user_id)
+        if user is None:
+            return None
+        profile = marshal(user, Users.response_fields)
+        profile_cache.set(('user', user_id), profile)
+
+    return dict(profile)
+
+
+def getUserInfo(user_id):
+    """Get a user's marshalled user info by user id, from profile_cache when possible
+
+    Returns:
+        A dict of UserInfos.response_fields, or None when the user has no user info
+    """
+    user_id = _userId(user_id)
+    if user_id is None:
+        return None
+
+    user_info = profile_cache.get(('user_info', user_id))
+    if user_info is None:
+        row = UserInfos.query.get(user_id)
+        user_info = marshal(row, UserInfos.response_fields) if row is not None else False
+        profile_cache.set(('user_info', user_id), user_info)
+
+    return dict(user_info) if user_info else None
+
+
+def invalidateProfile(user_id):
+    """Drop a user's cached data after it was written"""
+    profile_cache.delete(('user', _userId(user_id)))
+
+
+def invalidateUserInfo(user_id):
+    """Drop a user's cached user info after it was written"""
+    profile_cache.delete(('user_info', _userId(user_id)))
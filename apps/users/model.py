@@ -1,5 +1,7 @@
 from apps import db
 from flask_restful import fields
+from sqlalchemy import or_
+from sqlalchemy.orm import validates
 import re
 
 
@@ -14,6 +16,8 @@ class Users(db.Model):
         phone_number: a string of user's phone_number
         password: a string of user's password
         role: a boolean that indicates user role. True for admin and False for user
+        name_normalized: a string of user's name in lowercase with single spaces, indexed for prefix search
+        phone_reversed: a string of user's phone_number reversed, indexed for searching by the last digits
         created_at: a datetime that indicates when the account created
         updated_at: a datetime that indicates when the account last updated
         response_field: a dictionary that will be used to be a guide when extracting data from database's field
@@ -25,6 +29,8 @@ class Users(db.Model):
     phone_number = db.Column(db.String(30), unique=True, nullable=False)
     password = db.Column(db.String(100), nullable=False)
     role = db.Column(db.Integer, nullable=False)
+    name_normalized = db.Column(db.String(50), nullable=True, index=True)
+    phone_reversed = db.Column(db.String(30), nullable=True, index=True)
     created_at = db.Column(db.DateTime,  default=db.func.current_timestamp())
     updated_at = db.Column(db.DateTime,  default=db.func.current_timestamp(
     ), onupdate=db.func.current_timestamp())
@@ -64,13 +70,51 @@ class Users(db.Model):
         self.password = password
         self.role = role
 
-    def isEmailAddressValid(self, email):
+    @validates('name', 'phone_number')
+    def _updateSearchColumns(self, key, value):
+        """Keep name_normalized and phone_reversed in sync whenever name or phone_number is set"""
+        if key == 'name':
+            self.name_normalized = self.normalizeName(value)
+        else:
+            self.phone_reversed = self.normalizePhoneNumber(value)[::-1]
+        return value
+
+    @staticmethod
+    def normalizeName(name):
+        """Lowercase a name and collapse its whitespace, the form name_normalized is stored and searched in"""
+        return ' '.join((name or '').lower().split())
+
+    @staticmethod
+    def normalizePhoneNumber(phone_number):
+        """Keep only the digits of a phone number, turning the +62 country code into a leading 0
+
+        A number starting with 62 but written without the + is only taken for a country
+        code when it is long enough to be a whole number (62 followed by at least 9
+        digits), so searching the last digits "6234" still looks for "6234".
+        """
+        phone_number = (phone_number or '').strip()
+        digits = re.sub('[^0-9]', '', phone_number)
+        if digits.startswith('62') and (phone_number.startswith('+') or len(digits) >= 11):
+            digits = '0' + digits[2:]
+        return digits
+
+    @classmethod
+    def searchColumns(cls, name, phone_number):
+        """Get the search columns of a user, for inserts that do not go through the model"""
+        return {
+            'name_normalized': cls.normalizeName(name),
+            'phone_reversed': cls.normalizePhoneNumber(phone_number)[::-1],
+        }
+
+    @staticmethod
+    def isEmailAddressValid(email):
         """Validate the email address using a regex."""
         if not re.match("^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$", email):
             return False
         return True
 
-    def isPhoneNumberValid(self, phone_number):
+    @staticmethod
+    def isPhoneNumberValid(phone_number):
         """Validate the mobile phone using a regex."""
         if not re.match("^0[0-9]{9,}$", phone_number):
             return False
@@ -79,27 +123,45 @@ class Users(db.Model):
     @classmethod
     def isEmailExist(cls, email):
         """Check whether email already listed in database"""
-        all_data = cls.query.all()
-
-        # Make a list of email listed in database
-
-        existing_email = [item.email for item in all_data]
-
-        if email in existing_email:
-            return True
-
-        return False
+        return db.session.query(cls.query.filter_by(email=email).exists()).scalar()
 
     @classmethod
     def isPhoneNumberExist(cls, phone_number):
         """Check whether mobile number already listed in database"""
-        all_data = cls.query.all()
+        return db.session.query(cls.query.filter_by(phone_number=phone_number).exists()).scalar()
 
-        # Make a list of email listed in database
+    @classmethod
+    def findTakenFields(cls, email=None, phone_number=None, exclude_id=None):
+        """Find which of email and phone_number already belong to a user, in one query
 
-        existing_phone_number = [item.phone_number for item in all_data]
+        Both columns have a unique index, so the lookup reads at most two rows no matter
+        how many users there are.
 
-        if phone_number in existing_phone_number:
-            return True
+        Args:
+            email: a string of email to look for. None skips the email check
+            phone_number: a string of phone number to look for. None skips the phone number check
+            exclude_id: an integer of user's id whose own email and phone number are ignored
 
-        return False
+        Returns:
+            A set of the taken field names, for example: {'email'}
+        """
+        conditions = []
+        if email is not None:
+            conditions.append(cls.email == email)
+        if phone_number is not None:
+            conditions.append(cls.phone_number == phone_number)
+        if not conditions:
+            return set()
+
+        qry = db.session.query(cls.email, cls.phone_number).filter(or_(*conditions))
+        if exclude_id is not None:
+            qry = qry.filter(cls.id != exclude_id)
+
+        taken = set()
+        for row_email, row_phone_number in qry.limit(2):
+            if email is not None and row_email.lower() == email.lower():
+                taken.add('email')
+            if phone_number is not None and row_phone_number == phone_number:
+                taken.add('phone_number')
+
+        return taken
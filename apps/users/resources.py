@@ -1,14 +1,23 @@
-from flask import Blueprint, Response, json
+from flask import Blueprint, Response, json, request
 from flask_restful import Resource, Api, reqparse, marshal, inputs
 from .model import Users
-from sqlalchemy import desc
+from .cache import getProfile, invalidateProfile
+from apps.user_infos.model import UserInfos
+from sqlalchemy import desc, or_
+from sqlalchemy.exc import IntegrityError
 from apps import app, db, adminRequired, nonAdminRequired
 from flask_jwt_extended import jwt_required, get_jwt_claims
-from passlib.hash import sha256_crypt
+from apps.passwords import hasher, HashingBusy
 from ..commons import cors_value, cors_status, content_type_json
+from ..streaming import StreamedList
+from ..representations import registerRepresentations
+import csv
+import io
+import re
 
 bp_users = Blueprint('users', __name__)
 api = Api(bp_users)
+registerRepresentations(api)
 
 
 class UsersResource(Resource):
@@ -43,6 +52,7 @@ class UsersResource(Resource):
 
         Raises: 
             Bad Request (400): An error that occured when some of the field is missing, or if the data is not valid (email and mobile phone inputted is wrong formatted)        
+            Service Unavailable (503): An error that occured when the password hashing pool is saturated
         """
 
         parser = reqparse.RequestParser()
@@ -62,24 +72,29 @@ class UsersResource(Resource):
         if not users.isPhoneNumberValid(args['phone_number']):
             return {'message': 'Invalid mobile number format!'}, 400, content_type_json
 
-        # Check whether email is already exist in database
-        check_email = users.isEmailExist(args['email'])
-        if check_email is True:
+        # Check whether email or phone_number is already exist in database, both in one query
+        taken = Users.findTakenFields(args['email'], args['phone_number'])
+        if 'email' in taken:
             return {'message': 'Email already listed!'}, 400, content_type_json
 
-        # Check whether phone_number is already exist in database
-        check_phone_number = users.isPhoneNumberExist(args['phone_number'])
-        if check_phone_number is True:
+        if 'phone_number' in taken:
             return {'message': 'Mobile number already listed!'}, 400, content_type_json
 
         # Encrypt password using sha256
-        password_encrypted = sha256_crypt.hash(args['password'])
+        try:
+            password_encrypted = hasher.hash(args['password'])
+        except HashingBusy:
+            return {'message': 'Server is busy, please retry'}, 503, content_type_json
 
         # Input data to users table
         user = Users(args['name'], args['email'],
                      args['phone_number'], password_encrypted, False)
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return {'message': 'Email or mobile number already listed!'}, 400, content_type_json
 
         # get user id
         user_contain = marshal(user, Users.response_fields)
@@ -116,13 +131,11 @@ class UsersResource(Resource):
         """
 
         user = get_jwt_claims()
-        user_requested = Users.query.get(id)
+        requested = getProfile(id)
 
-        if user_requested is None:
+        if requested is None:
             return {'Status': 'Not Found'}, 404, content_type_json
 
-        requested = marshal(user_requested, Users.response_fields)
-
         if user['id'] != requested['id']:
             return {'Warning': 'You are not allowed to access others credentials'}, 403, content_type_json
 
@@ -171,43 +184,43 @@ class UsersResource(Resource):
         if args['name'] is not None:
             user_edited.name = args['name']
 
-        # checks email and edit it
-        if args['email'] is not None:
+        # checks the email and number phone format
+        if args['email'] is not None and not users.isEmailAddressValid(args['email']):
+            return {'message': 'Invalid email format!'}, 400, content_type_json
 
-            if not users.isEmailAddressValid(args['email']):
-                return {'message': 'Invalid email format!'}, 400, content_type_json
+        if args['phone_number'] is not None and not users.isPhoneNumberValid(args['phone_number']):
+            return {'message': 'Invalid mobile number format!'}, 400, content_type_json
+
+        # Check whether the new email or phone_number belongs to another user, both in one query
+        taken = Users.findTakenFields(args['email'], args['phone_number'], exclude_id=user_edited.id)
+        if 'email' in taken:
+            return {'message': 'Email already listed!'}, 400, content_type_json
 
-            if user_edited.email == args['email']:
-                pass
-            else:
-                check_email = users.isEmailExist(args['email'])
-                if check_email is True:
-                    return {'message': 'Email already listed!'}, 400, content_type_json
+        if 'phone_number' in taken:
+            return {'message': 'Mobile number already listed!'}, 400, content_type_json
 
+        if args['email'] is not None:
             user_edited.email = args['email']
 
-        # checks the number phone and edit it
         if args['phone_number'] is not None:
-
-            if not users.isPhoneNumberValid(args['phone_number']):
-                return {'message': 'Invalid mobile number format!'}, 400, content_type_json
-
-            if user_edited.phone_number == args['phone_number']:
-                pass
-            else:
-                check_phone_number = users.isPhoneNumberExist(
-                    args['phone_number'])
-                if check_phone_number is True:
-                    return {'message': 'Mobile number already listed!'}, 400, content_type_json
-
             user_edited.phone_number = args['phone_number']
 
         # checks if user input a new password
         if args['password'] is not None:
-            password_encrypted = sha256_crypt.hash(args['password'])
+            try:
+                password_encrypted = hasher.hash(args['password'])
+            except HashingBusy:
+                return {'message': 'Server is busy, please retry'}, 503, content_type_json
             user_edited.password = password_encrypted
 
-        db.session.commit()
+        # The unique indexes still guard against a concurrent request taking the same email or phone_number
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return {'message': 'Email or mobile number already listed!'}, 400, content_type_json
+
+        invalidateProfile(user_edited.id)
 
         return marshal(user_edited, Users.response_fields), 200, content_type_json
 
@@ -264,42 +277,333 @@ class AllUserResource(Resource):
 
     @adminRequired
     def get(self):
-        """Get all user's data from users table
+        """Export user's data from users table joined with their user infos
+
+        The rows are read from a server-side cursor and written as they arrive, so the
+        export runs in constant memory. Pages are chained with the next cursor.
+
+        Args (located in query string):
+            after: an integer cursor, only users with a greater id are exported. Defaults to 0
+            limit: an integer of users exported at most. Defaults to every remaining user
+
+            Returns : A dictionary with an array of users and the cursor of the next page (null on the last page). Example :
+            {
+                "data": [
+                    {
+                        "id" : 1,
+                        "name" : "user",
+                        "email" : "exp@exp.com"
+                        "phone_number" : "0898787878",
+                        "role": 0,
+                        "address": "Banyumas",
+                        "photo": "https://blabla.com",
+                        "birthdate": "24051998",
+                        "weight": 50,
+                        "height": 60
+                    },
+                    {
+                        "id" : 2,
+                        "name" : "user2",
+                        "email" : "exp2@exp.com"
+                        "phone_number" : "08298989898",
+                        "role": 0,
+                        "address": null,
+                        "photo": null,
+                        "birthdate": null,
+                        "weight": null,
+                        "height": null
+                    }
+                ],
+                "next": 2
+            }
+
+            Raise:
+              Forbidden(403): An error occured when standard user try to access this method.  
+        """
+        parser = reqparse.RequestParser()
+        parser.add_argument('after', type=int, location='args', default=0)
+        parser.add_argument('limit', type=inputs.positive, location='args')
+        args = parser.parse_args()
+
+        info_fields = {key: value for key, value in UserInfos.response_fields.items() if key != 'id'}
+        empty_info = {key: None for key in info_fields}
+
+        qry = db.session.query(
+            Users.id, Users.name, Users.email, Users.phone_number, Users.role,
+            UserInfos.id.label('info_id'), UserInfos.address, UserInfos.photo,
+            UserInfos.birthdate, UserInfos.weight, UserInfos.height
+        ).outerjoin(UserInfos, UserInfos.id == Users.id).filter(Users.id > args['after']).order_by(Users.id)
+
+        if args['limit'] is not None:
+            qry = qry.limit(args['limit'])
+
+        qry = qry.execution_options(stream_results=True).yield_per(1000)
+
+        last = {'id': None, 'count': 0}
+
+        def rows():
+            for row in qry:
+                row = row._asdict()
+                user = marshal(row, Users.response_fields)
+                user.update(marshal(row, info_fields) if row['info_id'] is not None else empty_info)
+                last['id'] = row['id']
+                last['count'] += 1
+                yield user
+
+        def extra():
+            # Only a page cut by the limit has a next page
+            has_next = args['limit'] is not None and last['count'] == args['limit']
+            return {'next': last['id'] if has_next else None}
+
+        return StreamedList(rows(), key='data', extra=extra), 200
+
+
+class UsersImportResource(Resource):
+    """Class for storing HTTP request method for importing many users at once, accessed by admin"""
+
+    MAX_ROWS = 10000
+    BATCH_SIZE = 500
+    COLUMNS = ('name', 'email', 'phone_number', 'password')
+
+    def __init__(self):
+        pass
+
+    def options(self, id=None):
+        """Flask-CORS function to make Flask allowing our apps to support cross origin resource sharing (CORS)"""
+        return cors_value, cors_status
+
+    def _readRows(self):
+        """Read the request body as a list of (row_number, dict) from CSV (with a header line) or NDJSON"""
+        text = request.get_data(as_text=True)
+        if request.mimetype == 'text/csv':
+            reader = csv.DictReader(io.StringIO(text))
+            return [(number, row) for number, row in enumerate(reader, start=1)]
+
+        rows = []
+        for number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            rows.append((number, row if isinstance(row, dict) else None))
+        return rows
+
+    def _validate(self, row, seen_emails, seen_phone_numbers):
+        """Get the error message of a row, or None when the row can be imported"""
+        if row is None:
+            return 'Invalid row format!'
+
+        for column in self.COLUMNS:
+            if not isinstance(row.get(column), str) or not row[column]:
+                return 'Missing {}!'.format(column)
+
+        if not Users.isEmailAddressValid(row['email']):
+            return 'Invalid email format!'
+
+        if not Users.isPhoneNumberValid(row['phone_number']):
+            return 'Invalid mobile number format!'
+
+        if row['email'].lower() in seen_emails:
+            return 'Email listed twice in the import!'
+
+        if row['phone_number'] in seen_phone_numbers:
+            return 'Mobile number listed twice in the import!'
+
+        return None
+
+    def _insert(self, batch, errors):
+        """Insert a batch in one multi-row statement, falling back to row by row when a row conflicts
+
+        Returns:
+            An integer of users created
+        """
+        try:
+            db.session.execute(Users.__table__.insert().values([values for number, values in batch]))
+            db.session.commit()
+            return len(batch)
+        except IntegrityError:
+            db.session.rollback()
+
+        created = 0
+        for number, values in batch:
+            try:
+                db.session.execute(Users.__table__.insert().values(values))
+                db.session.commit()
+                created += 1
+            except IntegrityError:
+                db.session.rollback()
+                errors.append({'row': number, 'message': 'Email or mobile number already listed!'})
+        return created
+
+    @adminRequired
+    def post(self):
+        """Create many users from a CSV or NDJSON body
+
+        The body is sent as text/csv with a header line, or as application/x-ndjson with
+        one JSON object per line. Each row has the same fields as a sign up: name, email,
+        phone_number and password. Rows are validated like a sign up, checked against the
+        users table in batches, hashed on the hashing pool and inserted in multi-row
+        statements. A failing row does not stop the others.
+
+        Returns:
+            A dict with the number of created users and the error of every failed row, for example:
+
+            {
+                "created": 2,
+                "failed": 1,
+                "errors": [
+                    {
+                        "row": 3,
+                        "message": "Email already listed!"
+                    }
+                ]
+            }
+
+        Raises:
+            Bad Request (400): An error that occured when the body is empty
+            Forbidden (403): An error occured when standard user try to access this method.
+            Payload Too Large (413): An error that occured when the body has more than MAX_ROWS rows
+            Service Unavailable (503): An error that occured when the hashing pool stays busy for longer than its queue timeout
+        """
+        rows = self._readRows()
+        if not rows:
+            return {'message': 'No user to import!'}, 400, content_type_json
+
+        if len(rows) > self.MAX_ROWS:
+            return {'message': 'At most {} users can be imported at once!'.format(self.MAX_ROWS)}, 413, content_type_json
+
+        errors = []
+        valid = []
+        seen_emails = set()
+        seen_phone_numbers = set()
+        for number, row in rows:
+            message = self._validate(row, seen_emails, seen_phone_numbers)
+            if message is not None:
+                errors.append({'row': number, 'message': message})
+                continue
+            seen_emails.add(row['email'].lower())
+            seen_phone_numbers.add(row['phone_number'])
+            valid.append((number, row))
+
+        # Drop rows whose email or phone_number is already listed, one query per batch
+        new = []
+        for start in range(0, len(valid), self.BATCH_SIZE):
+            batch = valid[start:start + self.BATCH_SIZE]
+            emails = [row['email'] for number, row in batch]
+            phone_numbers = [row['phone_number'] for number, row in batch]
+            listed = db.session.query(Users.email, Users.phone_number).filter(
+                or_(Users.email.in_(emails), Users.phone_number.in_(phone_numbers))).all()
+            listed_emails = set(email.lower() for email, phone_number in listed)
+            listed_phone_numbers = set(phone_number for email, phone_number in listed)
+
+            for number, row in batch:
+                if row['email'].lower() in listed_emails:
+                    errors.append({'row': number, 'message': 'Email already listed!'})
+                elif row['phone_number'] in listed_phone_numbers:
+                    errors.append({'row': number, 'message': 'Mobile number already listed!'})
+                else:
+                    new.append((number, row))
+
+        try:
+            passwords = hasher.hashMany([row['password'] for number, row in new])
+        except HashingBusy:
+            return {'message': 'Server is busy, please retry'}, 503, content_type_json
+
+        created = 0
+        for start in range(0, len(new), self.BATCH_SIZE):
+            batch = [(number, dict({
+                'name': row['name'],
+                'email': row['email'],
+                'phone_number': row['phone_number'],
+                'password': password,
+                'role': 0,
+            }, **Users.searchColumns(row['name'], row['phone_number']))) for (number, row), password in zip(new[start:start + self.BATCH_SIZE], passwords[start:start + self.BATCH_SIZE])]
+            created += self._insert(batch, errors)
+
+        errors.sort(key=lambda error: error['row'])
+        return {'created': created, 'failed': len(errors), 'errors': errors}, 200, content_type_json
+
+
+class UsersSearchResource(Resource):
+    """Class for storing HTTP request method for searching users, accessed by admin"""
+
+    MAX_LIMIT = 100
+
+    def __init__(self):
+        pass
+
+    def options(self, id=None):
+        """Flask-CORS function to make Flask allowing our apps to support cross origin resource sharing (CORS)"""
+        return cors_value, cors_status
+
+    @staticmethod
+    def _prefix(value):
+        """Escape LIKE wildcards so the value is matched literally as a prefix"""
+        return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+    @adminRequired
+    def get(self):
+        """Search users by the beginning of their name, email or phone number
+
+        The kind of search follows the query: a query with "@" matches email prefixes, a
+        query made of digits (spaces, dashes and a +62 prefix are allowed) matches the
+        beginning or the end of phone numbers, anything else matches name prefixes
+        ignoring case and extra spaces. Every kind is a prefix scan on an index and reads
+        at most limit rows.
+
+        Args (located in query string):
+            q: a string to search, at least 2 characters
+            limit: an integer of users returned at most. Defaults to 20, at most 100
 
-            Returns : An array of dictionary contains all data from users. Example :
+        Returns:
+            An array of users ordered by the matched column, for example:
             [
                 {
                     "id" : 1,
                     "name" : "user",
-                    "email" : "exp@exp.com"
+                    "email" : "exp@exp.com",
                     "phone_number" : "0898787878",
                     "role": 0
-                },
-                {
-                    "id" : 2,
-                    "name" : "user2",
-                    "email" : "exp2@exp.com"
-                    "phone_number" : "08298989898",
-                    "role": 0
                 }
             ]
 
-            Raise:
-              Forbidden(403): An error occured when standard user try to access this method.  
+        Raise:
+            Bad Request(400): An error occured when the query is shorter than 2 characters
+            Forbidden(403): An error occured when standard user try to access this method.
         """
-        users = Users.query
-        result = []
-        for user in users:
-            user = marshal(user, Users.response_fields)
-            attr = UserAttributes.query.filter_by(user_id=user['id'])
-            attr = marshal(attr, UserAttributes.response_fields)
-            attr.pop('user_id')
-            data = user.update(attr)
-            result.append(user)
+        parser = reqparse.RequestParser()
+        parser.add_argument('q', location='args', required=True)
+        parser.add_argument('limit', type=inputs.int_range(1, self.MAX_LIMIT), location='args', default=20)
+        args = parser.parse_args()
+
+        term = args['q'].strip()
+        if len(term) < 2:
+            return {'message': 'Search query is too short!'}, 400, content_type_json
+
+        limit = args['limit']
+        if '@' in term:
+            users = Users.query.filter(Users.email.like(self._prefix(term), escape='\\')).order_by(Users.email).limit(limit).all()
+
+        elif re.match('^[0-9+()\\- ]+$', term):
+            digits = Users.normalizePhoneNumber(term)
+            users = Users.query.filter(Users.phone_number.like(self._prefix(digits), escape='\\')).order_by(Users.phone_number).limit(limit).all()
+
+            # Support staff often only have the last digits of a number
+            if len(users) < limit:
+                found = set(user.id for user in users)
+                by_suffix = Users.query.filter(Users.phone_reversed.like(self._prefix(digits[::-1]), escape='\\')).order_by(Users.phone_reversed).limit(limit).all()
+                users += [user for user in by_suffix if user.id not in found][:limit - len(users)]
+
+        else:
+            users = Users.query.filter(Users.name_normalized.like(self._prefix(Users.normalizeName(term)), escape='\\')).order_by(Users.name_normalized).limit(limit).all()
 
-        return result, 200, content_type_json
+        return [marshal(user, Users.response_fields) for user in users], 200, content_type_json
 
 
 api.add_resource(UsersResource, '', '/<id>')
 api.add_resource(UsersForAdminResource, '/admin', '/admin/<id>')
 api.add_resource(AllUserResource, '/all')
+api.add_resource(UsersImportResource, '/import')
+api.add_resource(UsersSearchResource, '/search')
@@ -0,0 +1,62 @@
+"""Benchmark the prefix index serving the autocomplete endpoint
+
+Builds a PrefixIndex of ENTRIES synthetic provider names with random popularity
+(nothing is read from the database), then times QUERIES searches of prefixes one to
+six characters long, and the upsert of renamed entries. Short prefixes are answered
+from the precomputed top entries, longer ones rank their range of the sorted keys
+once and keep the ranking until the next write.
+
+    $ python3 benchmarks/autocomplete.py [entries]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from apps.autocomplete.index import PrefixIndex
+
+ENTRIES = 100000
+QUERIES = 5000
+UPSERTS = 500
+
+WORDS = ['bidan', 'sari', 'budi', 'rina', 'dewi', 'agus', 'wati', 'eko', 'putri', 'joko', 'ayu', 'lestari',
+         'hendra', 'pijat', 'bayi', 'spa', 'senam', 'hamil', 'laktasi', 'dokter', 'anak', 'wulandari']
+
+
+def makeName(rng):
+    return ' '.join(rng.choice(WORDS).title() for _ in range(rng.choice((2, 3))))
+
+
+def percentile(timings, share):
+    return timings[min(len(timings) - 1, int(len(timings) * share))]
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else ENTRIES
+    rng = random.Random(42)
+
+    index = PrefixIndex()
+    start = time.perf_counter()
+    index.build(('provider', i, makeName(rng), rng.randint(0, 500)) for i in range(count))
+    build = time.perf_counter() - start
+
+    prefixes = [rng.choice(WORDS)[:rng.randint(1, 6)] for _ in range(QUERIES)]
+    timings = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        index.search(prefix, 10)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    start = time.perf_counter()
+    for _ in range(UPSERTS):
+        index.upsert('provider', rng.randrange(count), makeName(rng))
+    upsert = (time.perf_counter() - start) * 1000 / UPSERTS
+
+    print('{} entries indexed in {:.1f} s, {} searches'.format(count, build, QUERIES))
+    print('{:<12} {:>10}'.format('', 'ms'))
+    print('{:<12} {:>10.3f}'.format('search p50', percentile(timings, 0.5)))
+    print('{:<12} {:>10.3f}'.format('search p99', percentile(timings, 0.99)))
+    print('{:<12} {:>10.3f}'.format('upsert', upsert))
@@ -0,0 +1,52 @@
+"""Benchmark the home endpoint against the four sequential calls it replaces
+
+Signs in as an existing user and times, for each iteration, the sequential client
+calls to /v1/user/<id>, /v1/user-info, /v1/user-condition and /v1/category/list
+against one call to /v1/home, then prints p50 and p99 of both. Needs the same
+environment as run.py because importing apps connects to the database.
+
+    $ python3 benchmarks/home_latency.py <email> <password> [iterations]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from apps import app
+
+
+def percentile(timings, fraction):
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * fraction))]
+
+
+if __name__ == '__main__':
+    email, password = sys.argv[1], sys.argv[2]
+    iterations = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    client = app.test_client()
+
+    login = client.post('/v1/auth', json={'email': email, 'password': password})
+    if login.status_code != 200:
+        sys.exit('login failed: {}'.format(login.get_json()))
+
+    headers = {'Authorization': 'Bearer ' + login.get_json()['access']}
+    user_id = client.get('/v1/auth', headers=headers).get_json()['claims']['id']
+    urls = ['/v1/user/{}'.format(user_id), '/v1/user-info', '/v1/user-condition', '/v1/category/list']
+
+    sequential = []
+    home = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        for url in urls:
+            client.get(url, headers=headers)
+        sequential.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        client.get('/v1/home', headers=headers)
+        home.append((time.perf_counter() - start) * 1000)
+
+    print('{:<12} {:>10} {:>10}'.format('path', 'p50 ms', 'p99 ms'))
+    print('{:<12} {:>10.2f} {:>10.2f}'.format('sequential', statistics.median(sequential), percentile(sequential, 0.99)))
+    print('{:<12} {:>10.2f} {:>10.2f}'.format('home', statistics.median(home), percentile(home, 0.99)))
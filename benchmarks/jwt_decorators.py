@@ -0,0 +1,59 @@
+"""Benchmark the authorization decorators before and after the verified-token cache
+
+Compares the old decorator path (verify_jwt_in_request() and get_jwt_claims() on every
+call, with the full marshalled user in the claims) against jwtRequired with compact
+claims. Needs the same environment as run.py because importing apps connects to the
+database.
+
+    $ python3 benchmarks/jwt_decorators.py [iterations]
+"""
+from functools import wraps
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask_jwt_extended import create_access_token, verify_jwt_in_request, get_jwt_claims
+from apps import app, jwtRequired
+
+
+def oldJwtRequired(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        verify_jwt_in_request()
+        claims = get_jwt_claims()
+        if claims['role'] != None:
+            return fn(*args, **kwargs)
+        return {'status': 'Forbidden', 'message': 'user only'}, 403
+    return wrapper
+
+
+def view():
+    return 'OK'
+
+
+def measure(decorated, token, iterations):
+    headers = {'Authorization': 'Bearer ' + token}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with app.test_request_context('/', headers=headers):
+            decorated()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+if __name__ == '__main__':
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    with app.app_context():
+        full_token = create_access_token(identity='dadang@conello.com', user_claims={
+            'id': 1, 'name': 'Dadang Sudadang', 'email': 'dadang@conello.com',
+            'phone_number': '0812121212121', 'role': 0})
+        compact_token = create_access_token(identity=1, user_claims={'id': 1, 'role': 0})
+
+    old_us = measure(oldJwtRequired(view), full_token, iterations)
+    new_us = measure(jwtRequired(view), compact_token, iterations)
+
+    print('{:<28} {:>10} {:>14}'.format('path', 'us/call', 'header bytes'))
+    print('{:<28} {:>10.1f} {:>14}'.format('old (full claims)', old_us, len(full_token) + 7))
+    print('{:<28} {:>10.1f} {:>14}'.format('new (cached, compact)', new_us, len(compact_token) + 7))
@@ -0,0 +1,68 @@
+"""Benchmark OFFSET pages against cursor pages of the categories list
+
+Seeds the categories table with enough rows for PAGES[-1] pages of RP rows, then
+times GET /v1/category/list for each page number in PAGES, once with ?p= (OFFSET)
+and once with the cursor the previous page would have linked to. The cursor column
+should stay flat while the OFFSET column grows with the page number. Run it against
+a throwaway database: FLASK_ENV=testing points apps at DB_NAME_TESTING.
+
+    $ FLASK_ENV=testing python3 benchmarks/list_pagination.py [max_page]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from apps import app, db
+from apps.categories.model import Categories
+from apps.pagination import encodeCursor
+
+PAGES = [1, 10, 100, 1000, 10000]
+RP = 25
+BATCH = 5000
+SAMPLES = 20
+
+
+def seed(start, stop):
+    for first in range(start, stop, BATCH):
+        db.session.execute(Categories.__table__.insert().values([{
+            'name': 'bench {}'.format(i),
+            'details': '',
+        } for i in range(first, min(first + BATCH, stop))]))
+        db.session.commit()
+
+
+def timeIt(client, url):
+    timings = []
+    for _ in range(SAMPLES):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.status_code
+    return statistics.median(timings)
+
+
+if __name__ == '__main__':
+    max_page = int(sys.argv[1]) if len(sys.argv) > 1 else PAGES[-1]
+    needed = max_page * RP
+    seeded = Categories.query.count()
+    if seeded < needed:
+        seed(seeded, needed)
+
+    client = app.test_client()
+    app.logger.disabled = True
+
+    print('{:>8} {:>16} {:>16}'.format('page', 'offset ms (p50)', 'cursor ms (p50)'))
+    for page in [page for page in PAGES if page <= max_page]:
+        offset_ms = timeIt(client, '/v1/category/list?rp={}&p={}'.format(RP, page))
+
+        url = '/v1/category/list?rp={}'.format(RP)
+        if page > 1:
+            # The cursor page p - 1 links to: the last id before this page
+            last_id = db.session.query(Categories.id).order_by(Categories.id).offset((page - 1) * RP - 1).limit(1).scalar()
+            url += '&cursor=' + encodeCursor('next', [last_id, last_id])
+        cursor_ms = timeIt(client, url)
+
+        print('{:>8} {:>16.3f} {:>16.3f}'.format(page, offset_ms, cursor_ms))
@@ -0,0 +1,46 @@
+"""Benchmark password verification throughput of the hashing pool
+
+Runs sha256_crypt verification through PasswordHasher with a growing number of pool
+workers and reports logins/sec in total and per core. Needs the same environment as
+run.py because importing apps connects to the database.
+
+    $ python3 benchmarks/login_throughput.py [seconds_per_step]
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from apps import app
+from apps.passwords import PasswordHasher
+
+
+def measure(workers, seconds):
+    hasher = PasswordHasher(app.config['PASSWORD_HASH_ROUNDS'], workers, workers * 4, 60)
+    hashed = hasher.hash('benchmark-password')
+    deadline = time.perf_counter() + seconds
+    done = [0]
+
+    def client():
+        while time.perf_counter() < deadline:
+            hasher.verify('benchmark-password', hashed)
+            done[0] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers * 2) as clients:
+        for _ in range(workers * 2):
+            clients.submit(client)
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+    return done[0] / elapsed
+
+
+if __name__ == '__main__':
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print('rounds={}'.format(app.config['PASSWORD_HASH_ROUNDS']))
+    print('{:>8} {:>12} {:>14}'.format('workers', 'logins/sec', 'logins/sec/core'))
+    for workers in range(1, (os.cpu_count() or 1) + 1):
+        rate = measure(workers, seconds)
+        print('{:>8} {:>12.1f} {:>14.1f}'.format(workers, rate, rate / workers))
@@ -0,0 +1,68 @@
+"""Benchmark the in-process inverted index the search falls back to without MySQL
+
+Indexes DOCS synthetic providers (name, role, almamater and details, as in
+search_indexes) in an InvertedIndex, nothing is read from the database, then times
+QUERIES searches of one and two words and prints their latency percentiles. The
+MySQL FULLTEXT backend is measured against a production sized database instead.
+
+    $ python3 benchmarks/search.py [docs]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from apps.search.backends import InvertedIndex
+
+DOCS = 100000
+QUERIES = 2000
+LIMIT = 20
+
+FIRST_NAMES = ['Sari', 'Budi', 'Rina', 'Dewi', 'Agus', 'Wati', 'Eko', 'Putri', 'Joko', 'Ayu', 'Lestari', 'Hendra']
+ROLES = ['midwife', 'doctor', 'nurse', 'therapist', 'bidan', 'perawat']
+SCHOOLS = ['Poltekkes Semarang', 'UGM', 'Unair', 'UI', 'Undip', 'Unpad', 'Akbid Banyumas', 'Poltekkes Malang']
+DETAILS = ['pijat bayi', 'baby spa', 'senam hamil', 'pijat laktasi', 'imunisasi', 'konsultasi anak', 'terapi']
+
+
+def makeDocs(count, rng):
+    for i in range(count):
+        yield i, ' '.join([
+            '{} {}'.format(rng.choice(FIRST_NAMES), rng.choice(FIRST_NAMES)),
+            rng.choice(ROLES),
+            rng.choice(SCHOOLS),
+            rng.choice(DETAILS),
+        ])
+
+
+def percentile(timings, share):
+    return timings[min(len(timings) - 1, int(len(timings) * share))]
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DOCS
+    rng = random.Random(42)
+
+    index = InvertedIndex()
+    start = time.perf_counter()
+    for doc_id, text in makeDocs(count, rng):
+        index.add(doc_id, text)
+    build = time.perf_counter() - start
+
+    words = FIRST_NAMES + ROLES + [word for text in SCHOOLS + DETAILS for word in text.split()]
+    queries = [' '.join(rng.sample(words, rng.choice((1, 2)))) for _ in range(QUERIES)]
+
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, LIMIT)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+
+    print('{} documents indexed in {:.1f} s, {} queries of limit {}'.format(count, build, QUERIES, LIMIT))
+    print('{:<8} {:>10}'.format('', 'ms'))
+    print('{:<8} {:>10.2f}'.format('p50', statistics.median(timings)))
+    print('{:<8} {:>10.2f}'.format('p99', percentile(timings, 0.99)))
+    print('{:<8} {:>10.2f}'.format('max', timings[-1]))
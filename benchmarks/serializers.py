@@ -0,0 +1,75 @@
+"""Benchmark the compiled serializers against flask_restful.marshal
+
+Builds ROWS OrderDetails objects in memory (nothing is written to the database) and
+times serializing them with marshal() and with the serializer compiled from
+OrderDetails.response_fields, then encoding the result with the standard library
+json module and with encodeJson (orjson when it is installed). The serializer
+output is checked to be identical to marshal before anything is timed.
+
+    $ python3 benchmarks/serializers.py [rows]
+"""
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask_restful import marshal
+from apps import app
+from apps.order_details.model import OrderDetails
+from apps.serializers import serializer, encodeJson, orjson
+
+ROWS = 10000
+REPEAT = 5
+
+
+def makeRows(count):
+    return [OrderDetails({
+        'user_id': i,
+        'service_id': i % 50,
+        'provider_id': i % 20,
+        'coupon_id': None if i % 3 else i % 7,
+        'date': '2026-10-{:02d}'.format(i % 28 + 1),
+        'time_start': '09:00',
+        'time_end': '10:00',
+        'address': 'Jl. Bench No. {}, Banyumas'.format(i),
+        'status': i % 4,
+        'price': 50000 + i,
+        'transport_price': 20000,
+        'total_price_after_discount': 65000 + i,
+        'info': None if i % 2 else 'bawa handuk',
+    }) for i in range(count)]
+
+
+def timeIt(function):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    rows = makeRows(count)
+    fields = OrderDetails.response_fields
+    serialize = serializer(fields)
+
+    marshalled = [marshal(row, fields) for row in rows]
+    serialized = [serialize(row) for row in rows]
+    assert serialized == marshalled
+    assert [list(item) for item in serialized] == [list(item) for item in marshalled]
+
+    # Debug mode indents the JSON output, time what production sends
+    app.config['DEBUG'] = False
+    with app.test_request_context():
+        print('{} OrderDetails rows, median of {} runs (orjson {})'.format(
+            count, REPEAT, 'installed' if orjson is not None else 'not installed'))
+        print('{:<28} {:>10}'.format('step', 'ms'))
+        print('{:<28} {:>10.1f}'.format('marshal', timeIt(lambda: [marshal(row, fields) for row in rows])))
+        print('{:<28} {:>10.1f}'.format('compiled serializer', timeIt(lambda: [serialize(row) for row in rows])))
+        print('{:<28} {:>10.1f}'.format('json.dumps', timeIt(lambda: json.dumps(marshalled))))
+        print('{:<28} {:>10.1f}'.format('encodeJson', timeIt(lambda: encodeJson(serialized))))
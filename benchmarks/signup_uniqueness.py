@@ -0,0 +1,66 @@
+"""Benchmark the signup uniqueness check as the users table grows
+
+Seeds the users table up to each size in SIZES (1M by default) with multi-row inserts,
+then times Users.findTakenFields() for emails and phone numbers that are not taken,
+which is the path every signup goes through. The old full-table scan is timed as
+well while the table is small enough for it to finish. Run it against a throwaway
+database: FLASK_ENV=testing points apps at DB_NAME_TESTING.
+
+    $ FLASK_ENV=testing python3 benchmarks/signup_uniqueness.py [max_users]
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from apps import db
+from apps.users.model import Users
+
+SIZES = [10000, 100000, 1000000]
+OLD_SCAN_LIMIT = 100000
+BATCH = 5000
+SAMPLES = 200
+
+
+def seed(start, stop):
+    for first in range(start, stop, BATCH):
+        db.session.execute(Users.__table__.insert().values([{
+            'name': 'bench {}'.format(i),
+            'email': 'bench{}@bench.id'.format(i),
+            'phone_number': '08{:010d}'.format(i),
+            'password': '-',
+            'role': 0,
+        } for i in range(first, min(first + BATCH, stop))]))
+        db.session.commit()
+
+
+def oldCheck(email, phone_number):
+    all_data = Users.query.all()
+    return email in [item.email for item in all_data], phone_number in [item.phone_number for item in all_data]
+
+
+def timeIt(check, size, samples):
+    timings = []
+    for i in range(samples):
+        start = time.perf_counter()
+        check('new{}@bench.id'.format(size + i), '09{:010d}'.format(size + i))
+        timings.append((time.perf_counter() - start) * 1000)
+        db.session.rollback()
+    return statistics.median(timings)
+
+
+if __name__ == '__main__':
+    max_users = int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1]
+    seeded = Users.query.filter(Users.email.like('bench%@bench.id')).count()
+
+    print('{:>10} {:>16} {:>16}'.format('users', 'indexed ms (p50)', 'full scan ms (p50)'))
+    for size in [size for size in SIZES if size <= max_users]:
+        if seeded < size:
+            seed(seeded, size)
+            seeded = size
+
+        new_ms = timeIt(Users.findTakenFields, size, SAMPLES)
+        old_ms = timeIt(oldCheck, size, 3) if size <= OLD_SCAN_LIMIT else float('nan')
+        print('{:>10} {:>16.3f} {:>16.1f}'.format(size, new_ms, old_ms))
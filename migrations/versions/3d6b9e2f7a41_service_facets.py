@@ -0,0 +1,34 @@
+"""service facets
+
+Revision ID: 3d6b9e2f7a41
+Revises: a93f27d4c1e8
+Create Date: 2026-10-18 18:12:07.448103
+
+The counts are filled by `python run.py rebuild_facets` after the upgrade.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d6b9e2f7a41'
+down_revision = 'a93f27d4c1e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('service_facets',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('role', sa.String(length=30), nullable=False),
+    sa.Column('price_bucket', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('category_id', 'role', 'price_bucket', name='uq_service_facets_key')
+    )
+
+
+def downgrade():
+    op.drop_table('service_facets')
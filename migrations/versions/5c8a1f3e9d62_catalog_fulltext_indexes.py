@@ -0,0 +1,26 @@
+"""catalog fulltext indexes
+
+Revision ID: 5c8a1f3e9d62
+Revises: e41d9c7a3b25
+Create Date: 2026-10-18 15:22:09.731840
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c8a1f3e9d62'
+down_revision = 'e41d9c7a3b25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ft_providers_text', 'providers', ['name', 'role', 'almamater', 'details'], unique=False, mysql_prefix='FULLTEXT')
+    op.create_index('ft_categories_text', 'categories', ['name', 'details'], unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    op.drop_index('ft_categories_text', table_name='categories')
+    op.drop_index('ft_providers_text', table_name='providers')
@@ -0,0 +1,48 @@
+"""users search columns
+
+Revision ID: 8d2e4b6a1c90
+Revises: 3f1c9a2d7b44
+Create Date: 2026-10-18 10:02:11.460217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from apps.users.model import Users
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2e4b6a1c90'
+down_revision = '3f1c9a2d7b44'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('name_normalized', sa.String(length=50), nullable=True))
+    op.add_column('users', sa.Column('phone_reversed', sa.String(length=30), nullable=True))
+
+    # Filled with the model's own normalization, which SQL can not express (collapsing whitespace)
+    users = sa.table('users', sa.column('id', sa.Integer), sa.column('name', sa.String),
+                     sa.column('phone_number', sa.String), sa.column('name_normalized', sa.String),
+                     sa.column('phone_reversed', sa.String))
+    update = users.update().where(users.c.id == sa.bindparam('user_id')).values(
+        name_normalized=sa.bindparam('normalized'), phone_reversed=sa.bindparam('reversed'))
+
+    connection = op.get_bind()
+    rows = connection.execute(sa.select([users.c.id, users.c.name, users.c.phone_number])).fetchall()
+    for start in range(0, len(rows), 1000):
+        connection.execute(update, [{
+            'user_id': user_id,
+            'normalized': Users.normalizeName(name),
+            'reversed': Users.normalizePhoneNumber(phone_number)[::-1],
+        } for user_id, name, phone_number in rows[start:start + 1000]])
+
+    op.create_index(op.f('ix_users_name_normalized'), 'users', ['name_normalized'], unique=False)
+    op.create_index(op.f('ix_users_phone_reversed'), 'users', ['phone_reversed'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_users_phone_reversed'), table_name='users')
+    op.drop_index(op.f('ix_users_name_normalized'), table_name='users')
+    op.drop_column('users', 'phone_reversed')
+    op.drop_column('users', 'name_normalized')
@@ -0,0 +1,24 @@
+"""schedules provider date index
+
+Revision ID: 8f2c4a6d1b39
+Revises: 3d6b9e2f7a41
+Create Date: 2026-10-18 19:03:51.207316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f2c4a6d1b39'
+down_revision = '3d6b9e2f7a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_schedules_provider_id_date', 'schedules', ['provider_id', 'date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_schedules_provider_id_date', table_name='schedules')
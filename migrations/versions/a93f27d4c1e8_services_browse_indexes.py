@@ -0,0 +1,26 @@
+"""services browse indexes
+
+Revision ID: a93f27d4c1e8
+Revises: 5c8a1f3e9d62
+Create Date: 2026-10-18 16:48:33.025614
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93f27d4c1e8'
+down_revision = '5c8a1f3e9d62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_services_transport_price'), 'services', ['transport_price'], unique=False)
+    op.create_index('ix_services_category_id_transport_price', 'services', ['category_id', 'transport_price'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_services_category_id_transport_price', table_name='services')
+    op.drop_index(op.f('ix_services_transport_price'), table_name='services')
@@ -0,0 +1,40 @@
+"""catalog list indexes
+
+Revision ID: b7e3f05c2a18
+Revises: 8d2e4b6a1c90
+Create Date: 2026-10-18 11:40:27.118304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3f05c2a18'
+down_revision = '8d2e4b6a1c90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_categories_name'), 'categories', ['name'], unique=False)
+    op.create_index(op.f('ix_conditions_condition'), 'conditions', ['condition'], unique=False)
+    op.create_index(op.f('ix_providers_name'), 'providers', ['name'], unique=False)
+    op.create_index(op.f('ix_providers_role'), 'providers', ['role'], unique=False)
+    op.create_index('ix_providers_role_name', 'providers', ['role', 'name'], unique=False)
+    op.create_index(op.f('ix_services_provider_id'), 'services', ['provider_id'], unique=False)
+    op.create_index(op.f('ix_services_category_id'), 'services', ['category_id'], unique=False)
+    op.create_index(op.f('ix_services_price'), 'services', ['price'], unique=False)
+    op.create_index('ix_services_category_id_price', 'services', ['category_id', 'price'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_services_category_id_price', table_name='services')
+    op.drop_index(op.f('ix_services_price'), table_name='services')
+    op.drop_index(op.f('ix_services_category_id'), table_name='services')
+    op.drop_index(op.f('ix_services_provider_id'), table_name='services')
+    op.drop_index('ix_providers_role_name', table_name='providers')
+    op.drop_index(op.f('ix_providers_role'), table_name='providers')
+    op.drop_index(op.f('ix_providers_name'), table_name='providers')
+    op.drop_index(op.f('ix_conditions_condition'), table_name='conditions')
+    op.drop_index(op.f('ix_categories_name'), table_name='categories')
@@ -0,0 +1,40 @@
+"""changes tombstones
+
+Revision ID: e41d9c7a3b25
+Revises: b7e3f05c2a18
+Create Date: 2026-10-18 14:05:51.402917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41d9c7a3b25'
+down_revision = 'b7e3f05c2a18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tombstones',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('table_name', sa.String(length=30), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tombstones_deleted_at'), 'tombstones', ['deleted_at'], unique=False)
+    op.create_index(op.f('ix_categories_updated_at'), 'categories', ['updated_at'], unique=False)
+    op.create_index(op.f('ix_conditions_updated_at'), 'conditions', ['updated_at'], unique=False)
+    op.create_index(op.f('ix_providers_updated_at'), 'providers', ['updated_at'], unique=False)
+    op.create_index(op.f('ix_services_updated_at'), 'services', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_services_updated_at'), table_name='services')
+    op.drop_index(op.f('ix_providers_updated_at'), table_name='providers')
+    op.drop_index(op.f('ix_conditions_updated_at'), table_name='conditions')
+    op.drop_index(op.f('ix_categories_updated_at'), table_name='categories')
+    op.drop_index(op.f('ix_tombstones_deleted_at'), table_name='tombstones')
+    op.drop_table('tombstones')
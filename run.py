@@ -11,7 +11,7 @@ api = Api(app, catch_all_404s=True)
 if __name__ == '__main__':
 
     try:
-        if sys.argv[1] == 'db':
+        if sys.argv[1] in ('db', 'rebuild_facets'):
             manager.run()
 
     except Exception as e: